@@ -0,0 +1,168 @@
+"""
+Кэш ответов api с версионной инвалидацией.
+
+    Ключ записи содержит версии пространств имен, от которых зависит ответ
+    (например `categories` или `titles:detail` и `titles:5`), поэтому для
+    инвалидации достаточно увеличить версию: старые записи перестают
+    находиться и вытесняются сами. Версии увеличиваются сигналами
+    при изменении данных, см. `api.signals`.
+
+    Кэш двухуровневый:
+
+    -- локальный: словарь в памяти процесса с вытеснением LRU и сроком
+    жизни записей `TIMEOUT`;
+
+    -- общий (необязательный): бэкенд кэша Django с именем `SHARED_ALIAS`.
+    В нем же хранятся версии, поэтому при нескольких процессах
+    инвалидация видна всем процессам.
+
+    Кроме ответов в кэше хранятся количества объектов для пагинации,
+    см. `api.pagination.CachedCountPagination`.
+
+    Настройки задаются словарем `API_CACHE` в settings.py.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+
+DEFAULT_OPTIONS = {
+    'COUNT_ESTIMATE_THRESHOLD': 10000,
+    'LOCAL_MAX_ENTRIES': 512,
+    'SHARED_ALIAS': None,
+    'TIMEOUT': 300,
+}
+
+
+class VersionedCache:
+    """Двухуровневый кэш с версиями пространств имен"""
+
+    def __init__(self):
+        self.local = OrderedDict()
+        self.versions = {}
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    @property
+    def options(self):
+        return {**DEFAULT_OPTIONS, **getattr(settings, 'API_CACHE', {})}
+
+    @property
+    def shared(self):
+        alias = self.options['SHARED_ALIAS']
+        return caches[alias] if alias else None
+
+    @staticmethod
+    def initial_version():
+        """
+        Начальная версия по текущему времени: после вытеснения версии
+        из кэша или перезапуска она не совпадет ни с одной старой.
+        """
+        return time.time_ns() // 1000
+
+    def get_version(self, namespace):
+        shared = self.shared
+        if shared is None:
+            with self.lock:
+                return self.versions.setdefault(
+                    namespace, self.initial_version()
+                )
+
+        key = f'version:{namespace}'
+        shared.add(key, self.initial_version(), None)
+        return shared.get(key)
+
+    def bump_version(self, namespace):
+        shared = self.shared
+        if shared is None:
+            with self.lock:
+                self.versions[namespace] = self.versions.get(
+                    namespace, self.initial_version()
+                ) + 1
+            return
+
+        key = f'version:{namespace}'
+        try:
+            shared.incr(key)
+        except ValueError:
+            shared.set(key, self.initial_version(), None)
+
+    def make_key(self, namespaces, path, params):
+        """
+        Ключ записи: версии всех пространств имен, от которых зависит
+        ответ, путь (для ответов - абсолютный адрес) и параметры запроса.
+        """
+        versions = ':'.join(
+            f'{namespace}={self.get_version(namespace)}'
+            for namespace in namespaces
+        )
+        query = urlencode(sorted(params.lists()), doseq=True)
+        return f'{versions}:{path}?{query}'
+
+    def count(self, namespace, event):
+        """Счётчики попаданий и промахов по пространству имен"""
+        with self.lock:
+            self.stats[f'{namespace}.{event}'] += 1
+
+    def snapshot(self):
+        """
+        Попадания и промахи по пространствам имен с долей попаданий.
+        Счётчики ведутся в памяти процесса: каждый процесс считает
+        только обработанные им запросы.
+        """
+        with self.lock:
+            stats = dict(self.stats)
+            entries = len(self.local)
+        namespaces = {}
+        for key, value in stats.items():
+            namespace, event = key.rsplit('.', 1)
+            namespaces.setdefault(
+                namespace, {'hits': 0, 'misses': 0}
+            )[event] = value
+        for counters in namespaces.values():
+            total = counters['hits'] + counters['misses']
+            counters['hit_rate'] = (
+                round(counters['hits'] / total, 3) if total else None
+            )
+        return {'local_entries': entries, 'namespaces': namespaces}
+
+    def get(self, key):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.local.get(key)
+            if entry is not None and entry[0] > now:
+                self.local.move_to_end(key)
+                return entry[1]
+
+        shared = self.shared
+        value = shared.get(key) if shared is not None else None
+        if value is not None:
+            self.set_local(key, value)
+        return value
+
+    def set(self, key, value):
+        self.set_local(key, value)
+        shared = self.shared
+        if shared is not None:
+            shared.set(key, value, self.options['TIMEOUT'])
+
+    def set_local(self, key, value):
+        options = self.options
+        with self.lock:
+            self.local[key] = (time.monotonic() + options['TIMEOUT'], value)
+            self.local.move_to_end(key)
+            while len(self.local) > options['LOCAL_MAX_ENTRIES']:
+                self.local.popitem(last=False)
+
+    def clear(self):
+        """Очищаем локальный уровень и локальные версии"""
+        with self.lock:
+            self.local.clear()
+            self.versions.clear()
+
+
+response_cache = VersionedCache()
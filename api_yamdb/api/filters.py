@@ -1,5 +1,7 @@
 import django_filters as filters
-from reviews.models import Title
+from django.db.models import Count, F
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from reviews.models import Comment, GenreTitle, Review, Title
 
 
 class TitleFilter(filters.FilterSet):
@@ -10,7 +12,100 @@ class TitleFilter(filters.FilterSet):
         lookup_expr='exact'
     )
     name = filters.CharFilter(field_name="name", lookup_expr='contains')
+    year_min = filters.NumberFilter(field_name='year', lookup_expr='gte')
+    year_max = filters.NumberFilter(field_name='year', lookup_expr='lte')
+    rating_min = filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    rating_max = filters.NumberFilter(field_name='rating', lookup_expr='lte')
 
     class Meta:
         model = Title
-        fields = ('name', 'year', 'genre', 'category')
+        fields = (
+            'name', 'year', 'genre', 'category',
+            'year_min', 'year_max', 'rating_min', 'rating_max',
+        )
+
+
+class ReviewSearchFilter(filters.FilterSet):
+    """Фильтр поиска отзывов: по произведению, автору и периоду"""
+    title = filters.NumberFilter(field_name='title_id')
+    author = filters.CharFilter(field_name='author__username')
+    date_from = filters.IsoDateTimeFilter(
+        field_name='pub_date', lookup_expr='gte'
+    )
+    date_to = filters.IsoDateTimeFilter(
+        field_name='pub_date', lookup_expr='lte'
+    )
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'date_from', 'date_to')
+
+
+class CommentSearchFilter(ReviewSearchFilter):
+    """Фильтр поиска комментариев: по произведению, автору и периоду"""
+    title = filters.NumberFilter(field_name='review__title_id')
+
+    class Meta:
+        model = Comment
+        fields = ('title', 'author', 'date_from', 'date_to')
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по индексу FTS5 из атрибута `search_index` вью.
+    Параметр `search`, слова ищутся по префиксу, выдача сортируется
+    по релевантности.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return view.search_index.search(queryset, query)
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    Сортировка по параметру `ordering` с добавлением первичного ключа:
+    при равных значениях (например рейтинга) порядок страниц однозначен.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and 'pk' not in ordering:
+            return (*ordering, 'pk')
+        return ordering
+
+
+def title_facets(queryset):
+    """
+    Количество произведений из queryset по жанрам, категориям
+    и десятилетиям. Каждая группа считается одним запросом GROUP BY
+    по подзапросу идентификаторов отфильтрованных произведений.
+    """
+    title_ids = queryset.order_by().values('pk')
+    titles = Title.objects.filter(pk__in=title_ids).order_by()
+    genres = GenreTitle.objects.filter(
+        title__in=title_ids, genre__isnull=False
+    ).values_list('genre__slug', 'genre__name').annotate(
+        count=Count('title', distinct=True)
+    ).order_by('genre__slug')
+    categories = titles.filter(category__isnull=False).values_list(
+        'category__slug', 'category__name'
+    ).annotate(count=Count('pk')).order_by('category__slug')
+    decades = titles.values(
+        decade=F('year') / 10 * 10
+    ).annotate(count=Count('pk')).order_by('decade')
+    return {
+        'count': titles.count(),
+        'genre': [
+            {'slug': slug, 'name': name, 'count': count}
+            for slug, name, count in genres
+        ],
+        'category': [
+            {'slug': slug, 'name': name, 'count': count}
+            for slug, name, count in categories
+        ],
+        'decade': list(decades),
+    }
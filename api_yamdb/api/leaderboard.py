@@ -0,0 +1,204 @@
+"""
+Лучшие произведения (top-N): в целом, по жанру и по категории.
+
+    Рейтинги хранятся в памяти процесса. Каждый рейтинг строится одним
+    запросом по хранимым полям `Title.rating_sum` и `Title.review_count`
+    (без агрегации отзывов) и держит `SIZE + SLACK` лучших произведений.
+    При изменении оценок сигналы (`api.signals`) вызывают `update`:
+    произведение переставляется во всех рейтингах своих жанров, категории
+    и общем. Если после перестановок в неполном рейтинге осталось меньше
+    `SIZE` произведений, он перестраивается при следующем обращении.
+
+    Структурные изменения (произведения, их жанры, категории и жанры)
+    сбрасывают все рейтинги. Рейтинги также перестраиваются не реже
+    раза в `TIMEOUT` секунд: так учитываются изменения, сделанные
+    в других процессах.
+
+    Взвешенный (байесовский) рейтинг не дает произведениям с одним-двумя
+    отзывами подняться на вершину:
+
+        score = (C * m + rating_sum) / (C + review_count)
+
+    где C - `PRIOR_WEIGHT`, m - средняя оценка по всем отзывам на момент
+    построения рейтинга.
+
+    Настройки задаются словарем `LEADERBOARD` в settings.py.
+"""
+
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, FloatField, Sum
+from django.db.models.functions import Cast
+from reviews.models import Title
+
+DEFAULT_OPTIONS = {
+    'PRIOR_WEIGHT': 10,
+    'SIZE': 20,
+    'SLACK': 10,
+    'TIMEOUT': 300,
+}
+
+OVERALL = 'overall'
+GENRE = 'genre'
+CATEGORY = 'category'
+
+
+class Board:
+    """
+    Один рейтинг.
+
+    Attributes
+    ----------
+    entries : list
+        отсортированные пары `(-score, title_id)`, лучшие первыми
+    complete : bool
+        в рейтинге все произведения группы, за последним никого нет
+    prior : float
+        средняя оценка для взвешенного рейтинга, None для обычного
+    expires : float
+        момент (`time.monotonic`), после которого рейтинг перестраивается
+    """
+
+    def __init__(self, entries, complete, prior, expires):
+        self.entries = entries
+        self.complete = complete
+        self.prior = prior
+        self.expires = expires
+
+    def discard(self, title_id):
+        self.entries = [
+            entry for entry in self.entries if entry[1] != title_id
+        ]
+
+    def place(self, title_id, score, capacity):
+        """Переставляем произведение по новой оценке"""
+        self.discard(title_id)
+        if score is not None:
+            entry = (-score, title_id)
+            if self.complete or (self.entries and entry < self.entries[-1]):
+                bisect.insort(self.entries, entry)
+            if len(self.entries) > capacity:
+                self.entries.pop()
+                self.complete = False
+
+
+class Leaderboards:
+    """Рейтинги лучших произведений по ключам `(вид, slug, взвешенный)`"""
+
+    def __init__(self):
+        self.boards = {}
+        self.lock = threading.Lock()
+
+    @property
+    def options(self):
+        return {**DEFAULT_OPTIONS, **getattr(settings, 'LEADERBOARD', {})}
+
+    def score(self, rating_sum, review_count, prior):
+        """Оценка произведения в рейтинге, None - без отзывов"""
+        if not review_count:
+            return None
+        if prior is None:
+            return rating_sum / review_count
+        weight = self.options['PRIOR_WEIGHT']
+        return (weight * prior + rating_sum) / (weight + review_count)
+
+    def score_expression(self, prior):
+        """SQL выражение оценки, совпадает со `score`"""
+        rating_sum = Cast(F('rating_sum'), FloatField())
+        if prior is None:
+            expression = rating_sum / F('review_count')
+        else:
+            weight = self.options['PRIOR_WEIGHT']
+            expression = (
+                (weight * prior + rating_sum) / (weight + F('review_count'))
+            )
+        return ExpressionWrapper(expression, output_field=FloatField())
+
+    @staticmethod
+    def prior_mean():
+        totals = Title.objects.aggregate(
+            rating_sum=Sum('rating_sum'), review_count=Sum('review_count')
+        )
+        if not totals['review_count']:
+            return 0.0
+        return totals['rating_sum'] / totals['review_count']
+
+    def build(self, key):
+        kind, slug, weighted = key
+        options = self.options
+        capacity = options['SIZE'] + options['SLACK']
+        queryset = Title.objects.filter(review_count__gt=0)
+        if kind == GENRE:
+            queryset = queryset.filter(genre__slug=slug)
+        elif kind == CATEGORY:
+            queryset = queryset.filter(category__slug=slug)
+
+        prior = self.prior_mean() if weighted else None
+        rows = queryset.annotate(
+            score=self.score_expression(prior)
+        ).order_by('-score', 'pk').values_list('pk', 'score')[:capacity]
+        entries = [(-score, pk) for pk, score in rows]
+        return Board(
+            entries,
+            complete=len(entries) < capacity,
+            prior=prior,
+            expires=time.monotonic() + options['TIMEOUT'],
+        )
+
+    def built(self, kind=OVERALL, slug=None, weighted=False):
+        """Рейтинг уже построен и хранится в памяти"""
+        with self.lock:
+            return (kind, slug, weighted) in self.boards
+
+    def top(self, kind=OVERALL, slug=None, weighted=False, limit=None):
+        """Идентификаторы лучших произведений, лучшие первыми"""
+        key = (kind, slug, weighted)
+        with self.lock:
+            board = self.boards.get(key)
+        if board is None or board.expires <= time.monotonic():
+            board = self.build(key)
+            with self.lock:
+                self.boards[key] = board
+
+        limit = limit or self.options['SIZE']
+        return [title_id for _, title_id in board.entries[:limit]]
+
+    def update(self, title_id):
+        """Переставляем произведение после изменения его оценок"""
+        title_id = int(title_id)
+        with self.lock:
+            if not self.boards:
+                return
+
+        rows = Title.objects.filter(pk=title_id).values_list(
+            'rating_sum', 'review_count', 'category__slug', 'genre__slug'
+        )
+        groups = {(OVERALL, None)}
+        rating_sum = review_count = None
+        for rating_sum, review_count, category, genre in rows:
+            groups.add((CATEGORY, category))
+            groups.add((GENRE, genre))
+
+        size = self.options['SIZE']
+        capacity = size + self.options['SLACK']
+        with self.lock:
+            for key, board in list(self.boards.items()):
+                if key[:2] not in groups:
+                    continue
+                board.place(
+                    title_id,
+                    self.score(rating_sum, review_count, board.prior),
+                    capacity,
+                )
+                if not board.complete and len(board.entries) < size:
+                    del self.boards[key]
+
+    def clear(self):
+        with self.lock:
+            self.boards.clear()
+
+
+leaderboards = Leaderboards()
@@ -1,10 +1,139 @@
+import hashlib
+
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
 from rest_framework.viewsets import GenericViewSet
 
+from .cache import response_cache
 from .permissions import AdminOrReadonly
 
 
+class VersionedMixin:
+    """
+    Пространства имен версий кэша, от которых зависит ответ вьюсета.
+    Версии увеличиваются сигналами при изменении данных, см. `api.signals`.
+    """
+    cache_namespace = None
+
+    def get_cache_namespaces(self):
+        return (self.cache_namespace, )
+
+
+class ConditionalGetMixin(VersionedMixin):
+    """
+    Базовый миксин условного GET.
+    ETag строится по версиям пространств имен и формату ответа, поэтому
+    на `If-None-Match` с актуальным ETag отвечаем 304 Not Modified
+    без запросов к базе и сериализации.
+
+    ETag выдается только при общем уровне кэша (`SHARED_ALIAS`): локальные
+    версии не видят записей, обработанных другими процессами, и не
+    устаревают, поэтому такой ETag отвечал бы 304 на изменённые данные
+    сколь угодно долго.
+    """
+
+    def get_etag(self, request):
+        """ETag ответа или None без общего уровня кэша"""
+        if response_cache.shared is None:
+            return None
+        versions = ':'.join(
+            f'{namespace}={response_cache.get_version(namespace)}'
+            for namespace in self.get_cache_namespaces()
+        )
+        digest = hashlib.md5(
+            f'{request.accepted_renderer.format}:{versions}'.encode()
+        ).hexdigest()
+        return quote_etag(digest)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """Миксин для вьюсетов: условный GET списка"""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """Миксин для вьюсетов: условный GET объекта"""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CachedResponseMixin(VersionedMixin):
+    """
+    Базовый миксин кэширования отрендеренных JSON ответов.
+    Ключ строится по схеме, хосту, пути, параметрам запроса и версиям
+    пространств имен из `get_cache_namespaces`: ссылки пагинации в ответе
+    абсолютные и зависят от хоста. Заголовок `X-Cache` сообщает HIT или MISS.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        namespaces = self.get_cache_namespaces()
+        key = response_cache.make_key(
+            namespaces,
+            request.build_absolute_uri(request.path),
+            request.query_params,
+        )
+        content = response_cache.get(key)
+        if content is not None:
+            response_cache.count(namespaces[0], 'hits')
+            response = HttpResponse(
+                content, content_type=request.accepted_renderer.media_type
+            )
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response_cache.count(namespaces[0], 'misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response.add_post_render_callback(
+                lambda rendered: response_cache.set(key, rendered.content)
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    """Миксин для вьюсетов: кэширует ответ списка"""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Миксин для вьюсетов: кэширует ответ объекта"""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
 class CreateListDeleteMixinSet(
         ListModelMixin,
         CreateModelMixin,
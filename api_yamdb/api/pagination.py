@@ -0,0 +1,111 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+from .cache import response_cache
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, получающий количество объектов из функции `get_count`"""
+
+    def __init__(self, object_list, per_page, get_count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.get_count = get_count
+
+    @cached_property
+    def count(self):
+        return self.get_count(self.object_list)
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    Постраничная пагинация с кэшированием общего количества объектов.
+
+    Для вьюсетов с версиями кэша (`get_cache_namespaces`, см. `api.mixins`)
+    количество хранится в `api.cache.response_cache` по ключу из версий,
+    пути и параметров запроса без номера страницы. Сигналы увеличивают
+    версии при изменении строк, поэтому при листании ленты
+    `SELECT COUNT(*)` выполняется один раз.
+
+    Количество больше `COUNT_ESTIMATE_THRESHOLD` считается оценкой: оно
+    хранится без версий и пересчитывается не чаще раза в `TIMEOUT`,
+    а не после каждой записи в большую ленту.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_keys = self.get_count_keys(request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        return CachedCountPaginator(
+            object_list, per_page, get_count=self.get_count
+        )
+
+    def get_count_keys(self, request, view):
+        get_namespaces = getattr(view, 'get_cache_namespaces', None)
+        if get_namespaces is None:
+            return None
+
+        params = request.query_params.copy()
+        params.pop(self.page_query_param, None)
+        if self.page_size_query_param:
+            params.pop(self.page_size_query_param, None)
+        return (
+            response_cache.make_key(
+                ('count', *get_namespaces()), request.path, params
+            ),
+            response_cache.make_key(
+                ('count:estimate', ), request.path, params
+            ),
+        )
+
+    def get_count(self, queryset):
+        if self.count_keys is None:
+            return queryset.count()
+
+        for key in self.count_keys:
+            count = response_cache.get(key)
+            if count is not None:
+                return count
+
+        count = queryset.count()
+        exact_key, estimate_key = self.count_keys
+        threshold = response_cache.options['COUNT_ESTIMATE_THRESHOLD']
+        response_cache.set(
+            estimate_key if count > threshold else exact_key, count
+        )
+        return count
+
+
+class FeedCursorPagination(CursorPagination):
+    """
+    Курсорная (keyset) пагинация лент по `(pub_date, id)`.
+    Порядок совпадает с составными индексами отзывов и комментариев,
+    поэтому любая страница читается диапазоном индекса без OFFSET и COUNT.
+    """
+    ordering = ('-pub_date', 'id')
+
+
+class FeedPagination(CachedCountPagination):
+    """
+    Пагинация лент отзывов и комментариев.
+    По умолчанию постраничная, как и во всём api. Если в запросе передан
+    параметр `cursor` (для первой страницы - пустой: `?cursor=`),
+    выдача переключается на курсорную пагинацию.
+    """
+    cursor_pagination_class = FeedCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        cursor_param = self.cursor_pagination_class.cursor_query_param
+        if cursor_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -12,6 +12,17 @@ class AdminOnlyPermission(permissions.BasePermission):
                 and request.user.is_admin) or request.user.is_staff
 
 
+class ModeratorAdminOnly(permissions.BasePermission):
+    """
+    Права доступа: только модератор или администратор.
+    """
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.is_moderator or request.user.is_admin
+        )
+
+
 class AuthorModeratorAdminOrReadOnly(permissions.BasePermission):
     """"
     Права доступа: Автор, модератор или администратор.
@@ -1,9 +1,10 @@
 import datetime as dt
 
-from django.db.models import Avg
+from django.db.models import Q
 from rest_framework import serializers, validators
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
+from reviews.confirmation import check_code
 from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
                             Title, User)
 
@@ -30,7 +31,16 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Review
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        fields = (
+            'id', 'text', 'author', 'score', 'pub_date', 'comment_count',
+        )
+
+
+class ReviewSearchSerializer(ReviewSerializer):
+    """Сериализатор найденных отзывов, с произведением отзыва."""
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title', )
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -53,24 +63,15 @@ class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для упаковки произведений"""
     genre = GenreSerializer(many=True, read_only=True)
     category = CategorySerializer(read_only=True)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         fields = (
-            'id', 'name', 'year', 'rating',
+            'id', 'name', 'year', 'rating', 'review_count',
             'description', 'genre', 'category',
         )
         model = Title
 
-    def get_rating(self, obj):
-        """Получаем среднюю оценку произведения по оценкам пользователей"""
-        rating = Review.objects.filter(
-            title=obj.id
-        ).aggregate(Avg('score'))['score__avg']
-        if rating is not None:
-            return round(rating)
-        return None
-
     def validate_year(self, value):
         """Валидация года выпуска произведения, сравнивая с текущим годом"""
         now = dt.date.today().year
@@ -81,6 +82,8 @@ class TitleSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """Получаем первоначальные данные, переданные в поле `genre`
         и поле `category`, проводим их валидацию.
+        Все жанры проверяются одним запросом `IN`, в `validated_data`
+        передаются найденные объекты моделей.
         """
         init_genre = self.initial_data.getlist('genre')
         if init_genre:
@@ -91,13 +94,16 @@ class TitleSerializer(serializers.ModelSerializer):
                     f'Expected a list, but got `{type(init_genre)}`.'
                 )
 
-            for slug in init_genre:
-                if not Genre.objects.filter(slug=slug).exists():
-                    raise ValidationError(
-                        f'`genre`: Does not exist slug str `{slug}`.'
-                    )
+            slugs = set(init_genre)
+            genres = list(Genre.objects.filter(slug__in=slugs))
+            missing = slugs.difference(genre.slug for genre in genres)
+            if missing:
+                raise ValidationError(
+                    '`genre`: Does not exist slug str '
+                    f'`{", ".join(sorted(missing))}`.'
+                )
 
-            data['genre'] = init_genre
+            data['genre'] = genres
 
         init_category = self.initial_data.get('category')
         if not init_category:
@@ -105,29 +111,27 @@ class TitleSerializer(serializers.ModelSerializer):
                 '`category`: This field is required.'
             )
 
-        if not Category.objects.filter(slug=init_category).exists():
+        category = Category.objects.filter(slug=init_category).first()
+        if category is None:
             raise ValidationError(
                 f'`category`: Does not exist slug str `{init_category}.`'
             )
 
-        data['category'] = Category.objects.get(slug=init_category)
+        data['category'] = category
 
         return data
 
     def create(self, validated_data):
-        genres = validated_data.pop('genre')
+        genres = validated_data.pop('genre', [])
         title, status = Title.objects.get_or_create(**validated_data)
-        genre = Genre.objects.filter(slug__in=genres)
-        title.genre.set(genre)
+        title.genre.set(genres)
 
         return title
 
     def update(self, instance, validated_data):
 
         if validated_data.get('genre'):
-            genres = validated_data.pop('genre')
-            genre = Genre.objects.filter(slug__in=genres)
-            instance.genre.set(genre)
+            instance.genre.set(validated_data.pop('genre'))
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -195,6 +199,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
         max_length=254,
         required=True,
     )
+    existing_user = None
 
     class Meta:
         model = User
@@ -218,37 +223,36 @@ class UserCreateSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         """
-        Валидация username и email.
-        Если email и username совпадают, то все ок, делаем запрос на себя
+        Валидация username и email одним запросом.
+        Если email и username совпадают, то все ок, найденный пользователь
+        сохраняется в `existing_user`, делаем запрос на себя
         и получаем токен.
         Если совпадает только что-то одно, то выводим ошибку с инфой.
         """
-        if User.objects.filter(username=attrs['username'],
-                               email=attrs['email']).exists():
-            return attrs
-        if (
-            User.objects.filter(username=attrs['username']).exists()
-            or User.objects.filter(email=attrs['email']).exists()
-        ):
-            message_dict = {}
-            if User.objects.filter(username=attrs['username']).exists():
-                message_dict.update(
-                    {
-                        'username':
-                        'Пользователь с именем {} уже есть в базе.'.format(
-                            attrs['username']
-                        )
-                    }
+        users = User.objects.filter(
+            Q(username=attrs['username']) | Q(email=attrs['email'])
+        )
+        message_dict = {}
+        for user in users:
+            if (
+                user.username == attrs['username']
+                and user.email == attrs['email']
+            ):
+                self.existing_user = user
+                return attrs
+            if user.username == attrs['username']:
+                message_dict['username'] = (
+                    'Пользователь с именем {} уже есть в базе.'.format(
+                        attrs['username']
+                    )
                 )
-            if User.objects.filter(email=attrs['email']).exists():
-                message_dict.update(
-                    {
-                        'email':
-                        'Пользователь с адресом {} уже есть в базе.'.format(
-                            attrs['email']
-                        )
-                    }
+            if user.email == attrs['email']:
+                message_dict['email'] = (
+                    'Пользователь с адресом {} уже есть в базе.'.format(
+                        attrs['email']
+                    )
                 )
+        if message_dict:
             raise serializers.ValidationError(message_dict)
         return attrs
 
@@ -269,8 +273,8 @@ class ConfirmationSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         user = get_object_or_404(User, username=attrs['username'])
-        if not user.confirmation_code == attrs['confirmation_code']:
-            raise serializers.ValidationError(
-                {'confirmation_code': 'Неверный код подтверждения.'}
-            )
+        error = check_code(user, attrs['confirmation_code'])
+        if error is not None:
+            raise serializers.ValidationError({'confirmation_code': error})
+        attrs['user'] = user
         return attrs
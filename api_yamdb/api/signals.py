@@ -0,0 +1,195 @@
+"""
+Сигналы инвалидации кэша ответов api.
+
+При изменении данных увеличивается версия соответствующего пространства
+имен кэша (`api.cache.response_cache`), после чего закэшированные ответы
+перестают использоваться.
+
+Пространства имен произведений:
+
+-- `titles`: список произведений, меняется при любом изменении
+произведений, их жанров, категорий и оценок;
+
+-- `titles:<pk>`: одно произведение, меняется при изменении самого
+произведения, его жанров и оценок его отзывов;
+
+-- `titles:detail`: все произведения сразу, меняется при изменении
+справочников категорий и жанров (редкие изменения).
+
+Версии лент отзывов и комментариев используются для ETag условного GET:
+`reviews:<title_id>`, `comments:<review_id>` и общая `feeds`, которая
+меняется при изменении пользователей (в лентах выводится username).
+Лента отзывов меняется и при создании, удалении и переносе комментариев:
+в ней выводится `comment_count`.
+
+Рейтинги лучших произведений (`api.leaderboard.leaderboards`) обновляются
+при изменении оценок и сбрасываются при структурных изменениях.
+
+Версии и рейтинги меняются только после фиксации транзакции записи
+(`transaction.on_commit`).
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save)
+from django.dispatch import receiver
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+from .cache import response_cache
+from .leaderboard import leaderboards
+
+
+def bump(*namespaces):
+    """
+    Увеличиваем версии после фиксации транзакции записи: иначе
+    параллельный запрос получит новую версию, прочитает ещё старые строки
+    и закэширует их под новой версией.
+    """
+    def bump_versions():
+        for namespace in namespaces:
+            response_cache.bump_version(namespace)
+
+    transaction.on_commit(bump_versions)
+
+
+cache_namespaces = {
+    Category: 'categories',
+    Genre: 'genres',
+}
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def bump_cache_version(sender, **kwargs):
+    """Инвалидируем кэш списка изменённой модели"""
+    bump(cache_namespaces[sender], 'titles', 'titles:detail')
+    transaction.on_commit(leaderboards.clear)
+
+
+def bump_titles(*title_ids):
+    """Инвалидируем кэш списка и перечисленных произведений"""
+    bump('titles', *(f'titles:{title_id}' for title_id in title_ids))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def bump_title(sender, instance, **kwargs):
+    bump_titles(instance.pk)
+    transaction.on_commit(leaderboards.clear)
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def bump_genre_title(sender, instance, **kwargs):
+    bump_titles(instance.title_id)
+    transaction.on_commit(leaderboards.clear)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    """Жанры произведения изменены через `Title.genre` или `Genre.title_set`"""
+    if not action.startswith('post_'):
+        return
+    transaction.on_commit(leaderboards.clear)
+    if not reverse:
+        bump_titles(instance.pk)
+    elif pk_set:
+        bump_titles(*pk_set)
+    else:
+        bump('titles', 'titles:detail')
+
+
+def rated_titles(instance, created):
+    """
+    Произведения, рейтинг которых изменился при сохранении отзыва:
+    только при новой оценке, её изменении или переносе отзыва.
+    """
+    stored = getattr(instance, '_stored_rating', None)
+    if not created and stored == (instance.title_id, int(instance.score)):
+        return ()
+    if stored is not None and stored[0] != instance.title_id:
+        return (stored[0], instance.title_id)
+    return (instance.title_id, )
+
+
+@receiver(post_save, sender=Review)
+def bump_review_title(sender, instance, created, **kwargs):
+    for title_id in rated_titles(instance, created):
+        bump_titles(title_id)
+        transaction.on_commit(partial(leaderboards.update, title_id))
+
+
+@receiver(post_delete, sender=Review)
+def bump_deleted_review_title(sender, instance, **kwargs):
+    bump_titles(instance.title_id)
+    transaction.on_commit(partial(leaderboards.update, instance.title_id))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_reviews(sender, instance, **kwargs):
+    bump(f'reviews:{instance.title_id}')
+    stored = getattr(instance, '_stored_rating', None)
+    if stored is not None and stored[0] != instance.title_id:
+        bump(f'reviews:{stored[0]}')
+
+
+def counted_reviews(instance, created):
+    """
+    Отзывы, количество комментариев (`comment_count`) которых изменилось
+    при сохранении комментария: только при создании или переносе.
+    """
+    stored = getattr(instance, '_stored_review_id', None)
+    if created or stored is None:
+        return (instance.review_id, )
+    if stored != instance.review_id:
+        return (stored, instance.review_id)
+    return ()
+
+
+def bump_review_feeds(*review_ids):
+    """
+    Счётчик комментариев меняется через `QuerySet.update` без сигналов
+    отзыва, поэтому ленты отзывов с этим счётчиком инвалидируем здесь.
+    """
+    title_ids = set(Review.objects.filter(
+        pk__in=review_ids
+    ).values_list('title_id', flat=True))
+    bump(*(f'reviews:{title_id}' for title_id in title_ids))
+
+
+@receiver(post_save, sender=Comment)
+def bump_comments(sender, instance, created, **kwargs):
+    review_ids = counted_reviews(instance, created)
+    bump(*(
+        f'comments:{review_id}'
+        for review_id in {instance.review_id, *review_ids}
+    ))
+    if review_ids:
+        bump_review_feeds(*review_ids)
+
+
+@receiver(post_delete, sender=Comment)
+def bump_deleted_comment(sender, instance, **kwargs):
+    bump(f'comments:{instance.review_id}')
+    bump_review_feeds(instance.review_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_feeds(sender, **kwargs):
+    bump('feeds')
+
+
+@receiver(post_migrate)
+def clear_cache(sender, **kwargs):
+    """После миграций и очистки базы (flush) кэш недействителен"""
+    response_cache.clear()
+    if response_cache.shared is not None:
+        response_cache.shared.clear()
+    leaderboards.clear()
@@ -1,9 +1,10 @@
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
-from .views import (CategoryViewSet, CommentViewSet, ConfirmationAPIView,
-                    GenreViewSet, ReviewViewSet, TitleViewSet,
-                    UserCreateAPIView, UserViewSet)
+from .views import (CacheStatsAPIView, CategoryViewSet, CommentSearchViewSet,
+                    CommentViewSet, ConfirmationAPIView, ExportAPIView,
+                    GenreViewSet, ReviewSearchViewSet, ReviewViewSet,
+                    TitleViewSet, UserCreateAPIView, UserViewSet)
 
 app_name = 'api'
 
@@ -20,9 +21,23 @@ v1_router.register(
     CommentViewSet,
     basename='comment'
 )
+v1_router.register(
+    'search/reviews', ReviewSearchViewSet, basename='search_reviews'
+)
+v1_router.register(
+    'search/comments', CommentSearchViewSet, basename='search_comments'
+)
 
 urlpatterns = [
     path('v1/auth/signup/', UserCreateAPIView.as_view(), name='user_create'),
     path('v1/auth/token/', ConfirmationAPIView.as_view(), name='confirm_user'),
+    path(
+        'v1/export/<slug:filename>.<slug:file_format>',
+        ExportAPIView.as_view(),
+        name='export'
+    ),
+    path(
+        'v1/cache/stats/', CacheStatsAPIView.as_view(), name='cache_stats'
+    ),
     path('v1/', include(v1_router.urls)),
 ]
@@ -1,26 +1,43 @@
-from django.core.mail import send_mail
-from django.shortcuts import get_object_or_404
+import os
+
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status, viewsets
+from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.confirmation import issue_code
+from reviews.export import EXPORT_FORMATS, get_export_model_name
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.outbox import enqueue_mail, notify_review_comment
+from reviews.search import comment_index, review_index, title_index
 
-from .filters import TitleFilter
-from .mixins import CreateListDeleteMixinSet
+from .cache import response_cache
+from .filters import (CommentSearchFilter, FullTextSearchFilter,
+                      ReviewSearchFilter, StableOrderingFilter, TitleFilter,
+                      title_facets)
+from .leaderboard import CATEGORY, GENRE, OVERALL, leaderboards
+from .mixins import (CachedListMixin, CachedRetrieveMixin,
+                     ConditionalListMixin, ConditionalRetrieveMixin,
+                     CreateListDeleteMixinSet)
+from .pagination import FeedPagination
 from .permissions import (AdminOnlyPermission, AdminOrReadonly,
-                          AuthorModeratorAdminOrReadOnly)
+                          AuthorModeratorAdminOrReadOnly, ModeratorAdminOnly)
 from .serializers import (CategorySerializer, CommentSerializer,
                           ConfirmationSerializer, GenreSerializer,
-                          ReviewSerializer, TitleSerializer,
-                          UserCreateSerializer, UserSerializer)
+                          ReviewSearchSerializer, ReviewSerializer,
+                          TitleSerializer, UserCreateSerializer,
+                          UserSerializer)
 
 
-class CategoryViewSet(CreateListDeleteMixinSet):
+class CategoryViewSet(ConditionalListMixin, CachedListMixin,
+                      CreateListDeleteMixinSet):
     """Вью сет для работы с категориями произведений"""
+    cache_namespace = 'categories'
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = (AdminOrReadonly, )
@@ -29,8 +46,10 @@ class CategoryViewSet(CreateListDeleteMixinSet):
     lookup_field = 'slug'
 
 
-class GenreViewSet(CreateListDeleteMixinSet):
+class GenreViewSet(ConditionalListMixin, CachedListMixin,
+                   CreateListDeleteMixinSet):
     """Вью сет для работы с жанрами произведений"""
+    cache_namespace = 'genres'
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     permission_classes = (AdminOrReadonly, )
@@ -39,48 +58,231 @@ class GenreViewSet(CreateListDeleteMixinSet):
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    """Вью сет для работы с произведениями"""
+class TitleViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                   CachedListMixin, CachedRetrieveMixin,
+                   viewsets.ModelViewSet):
+    """
+    Вью сет для работы с произведениями.
+    Ответы списка и объекта кэшируются отрендеренными, см. `api.signals`.
+    """
     queryset = Title.objects.all()
     serializer_class = TitleSerializer
-    filter_backends = (DjangoFilterBackend, )
+    filter_backends = (
+        DjangoFilterBackend, FullTextSearchFilter, StableOrderingFilter
+    )
     filterset_class = TitleFilter
+    ordering_fields = ('rating', 'year', 'name', 'review_count')
     permission_classes = (AdminOrReadonly, )
+    search_index = title_index
+
+    def get_cache_namespaces(self):
+        if self.action == 'retrieve':
+            return ('titles:detail', f'titles:{self.kwargs["pk"]}')
+        return ('titles', )
+
+    def get_queryset(self):
+        """
+        Для чтения подгружаем категорию через JOIN и жанры одним
+        дополнительным запросом. Рейтинг хранится в самой модели, поэтому
+        страница списка отдаётся за постоянное число запросов.
+        """
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'top'):
+            queryset = queryset.select_related('category').prefetch_related(
+                Prefetch('genre', queryset=Genre.objects.all())
+            )
+        return queryset
+
+    @action(methods=['get'], detail=False)
+    def top(self, request):
+        """
+        Лучшие произведения: в целом, по жанру (`?genre=`) или категории
+        (`?category=`). `?limit=` ограничивает количество, `?weighted=true`
+        включает взвешенный (байесовский) рейтинг. Рейтинг строится только
+        для существующих жанров и категорий, иначе 404.
+        """
+        genre = request.query_params.get('genre')
+        category = request.query_params.get('category')
+        if genre and category:
+            raise ValidationError(
+                '`genre` and `category` can not be used together.'
+            )
+        kind, slug = OVERALL, None
+        if genre:
+            kind, slug = GENRE, genre
+        elif category:
+            kind, slug = CATEGORY, category
+
+        size = leaderboards.options['SIZE']
+        limit = request.query_params.get('limit', str(size))
+        if not limit.isdigit() or not 0 < int(limit) <= size:
+            raise ValidationError(
+                f'`limit`: Must be an integer from 1 to {size}.'
+            )
+        weighted = request.query_params.get('weighted') in ('true', '1')
+        if slug and not leaderboards.built(kind, slug, weighted):
+            model = Genre if kind == GENRE else Category
+            if not model.objects.filter(slug=slug).exists():
+                raise NotFound(f'`{kind}` `{slug}` not found.')
 
+        title_ids = leaderboards.top(kind, slug, weighted, int(limit))
+        titles = self.get_queryset().in_bulk(title_ids)
+        serializer = self.get_serializer(
+            [titles[pk] for pk in title_ids if pk in titles], many=True
+        )
+        return Response(serializer.data)
 
-class CommentViewSet(viewsets.ModelViewSet):
+    @action(methods=['get'], detail=False)
+    def facets(self, request):
+        """
+        Количество произведений по жанрам, категориям и десятилетиям
+        для тех же параметров фильтрации, что и у списка.
+        """
+        return self.cached_response(self.count_facets, request)
+
+    def count_facets(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(title_facets(queryset))
+
+
+class CommentViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                     viewsets.ModelViewSet):
     """Вью сет для работы с комментариями к произведениям."""
     serializer_class = CommentSerializer
     permission_classes = (AuthorModeratorAdminOrReadOnly, )
+    pagination_class = FeedPagination
+
+    read_fields = ('id', 'review_id', 'text', 'pub_date', 'author__username')
+
+    def get_cache_namespaces(self):
+        return ('feeds', f'comments:{self.kwargs.get("review_id")}')
+
+    review = None
+
+    def get_review(self):
+        """
+        Отзыв из адреса, относящийся к произведению из адреса: один
+        запрос JOIN за время запроса к вью, 404 при несовпадении.
+        Вместе с отзывом читаются поля автора для уведомлений.
+        """
+        if self.review is None:
+            self.review = Review.objects.filter(
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            ).select_related('author').only(
+                'id', 'author__id', 'author__email'
+            ).first()
+            if self.review is None:
+                raise NotFound()
+        return self.review
 
     def get_queryset(self):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, pk=review_id)
-        return review.comments.all()
+        """
+        Фильтруем комментарии по отзыву и произведению отзыва из адреса
+        и подгружаем автора тем же запросом (для чтения - только поля
+        ответа и username автора). Для списка отсутствующий отзыв дает 404,
+        для объекта это обеспечивает сам фильтр.
+        """
+        if self.action == 'list':
+            self.get_review()
+        queryset = Comment.objects.filter(
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id'),
+        ).select_related('author')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.only(*self.read_fields)
+        return queryset
 
     def perform_create(self, serializer):
-        review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, pk=review_id)
-        serializer.save(review=review, author=self.request.user)
+        review = self.get_review()
+        with transaction.atomic():
+            comment = serializer.save(review=review, author=self.request.user)
+            notify_review_comment(review, comment)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalListMixin, ConditionalRetrieveMixin,
+                    viewsets.ModelViewSet):
     """Вью сет для работы с отзывами на произведения"""
     serializer_class = ReviewSerializer
     permission_classes = (AuthorModeratorAdminOrReadOnly, )
+    pagination_class = FeedPagination
+
+    read_fields = (
+        'id', 'title_id', 'text', 'score', 'pub_date', 'comment_count',
+        'author__username',
+    )
+
+    def get_cache_namespaces(self):
+        return ('feeds', f'reviews:{self.kwargs.get("title_id")}')
+
+    def check_title(self):
+        """
+        Одна проверка существования произведения из адреса.
+        Возвращает `title_id` числом: он попадает в сохраненный отзыв
+        и дальше в сигналы.
+        """
+        try:
+            title_id = int(self.kwargs.get('title_id'))
+        except (TypeError, ValueError):
+            raise NotFound()
+        if not Title.objects.filter(pk=title_id).exists():
+            raise NotFound()
+        return title_id
 
     def get_queryset(self):
+        """
+        Фильтруем отзывы по `title_id` без загрузки произведения
+        и подгружаем автора тем же запросом (для чтения - только поля
+        ответа и username автора). Для списка отсутствующее произведение
+        дает 404, для объекта это обеспечивает сам фильтр.
+        """
         title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
-        return title.reviews.all()
+        if self.action == 'list':
+            self.check_title()
+        queryset = Review.objects.filter(
+            title_id=title_id
+        ).select_related('author')
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.only(*self.read_fields)
+        return queryset
 
     def perform_create(self, serializer):
-        title_id = self.kwargs.get('title_id')
-        if self.request.user.reviews.filter(title=title_id).exists():
+        """
+        Один отзыв на произведение от автора обеспечивает ограничение
+        `unique_title` в базе: нарушение переводим в ошибку 400.
+        """
+        title_id = self.check_title()
+        try:
+            with transaction.atomic():
+                serializer.save(author=self.request.user, title_id=title_id)
+        except IntegrityError:
             raise ValidationError("Only one reviews in titles, sorry.")
 
-        title = get_object_or_404(Title, pk=title_id)
-        serializer.save(author=self.request.user, title=title)
+
+class ReviewSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Вью сет полнотекстового поиска по тексту отзывов для модераторов.
+    Поиск `search`, фильтры `title`, `author`, `date_from`, `date_to`.
+    """
+    queryset = Review.objects.select_related('author')
+    serializer_class = ReviewSearchSerializer
+    permission_classes = (ModeratorAdminOnly, )
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
+    filterset_class = ReviewSearchFilter
+    search_index = review_index
+
+
+class CommentSearchViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Вью сет полнотекстового поиска по тексту комментариев для модераторов.
+    Поиск `search`, фильтры `title`, `author`, `date_from`, `date_to`.
+    """
+    queryset = Comment.objects.select_related('author')
+    serializer_class = CommentSerializer
+    permission_classes = (ModeratorAdminOnly, )
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter)
+    filterset_class = CommentSearchFilter
+    search_index = comment_index
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -121,27 +323,23 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class UserCreateAPIView(APIView):
     """
-    Класс для создания нового пользователя
+    Класс для создания нового пользователя.
+    Письмо с кодом подтверждения ставится в очередь отправки,
+    см. `reviews.outbox`. Существующего пользователя находит
+    `UserCreateSerializer.validate`, новый создается вместе с кодом.
     """
     def post(self, request, *args, **kwargs):
         serializer = UserCreateSerializer(data=request.data)
         if serializer.is_valid():
-            if not User.objects.filter(
-                username=serializer.validated_data['username']
-            ).exists():
-                serializer.save(role='user')
-            user = User.objects.get(
-                username=serializer.validated_data['username']
-            )
-            user.confirmation_code = str(RefreshToken.for_user(user))
-            user.save(update_fields=['confirmation_code'])
-            send_mail(
-                'Confirmation code.',
-                user.confirmation_code,
-                'no_replay@yambd.ru',
-                [user.email, ],
-                fail_silently=False,
+            user = serializer.existing_user or User(
+                **{**serializer.validated_data, 'role': User.USER}
             )
+            with transaction.atomic():
+                enqueue_mail(
+                    'Confirmation code.',
+                    issue_code(user),
+                    [user.email, ],
+                )
             return Response(
                 serializer.validated_data,
                 status=status.HTTP_200_OK,
@@ -152,17 +350,55 @@ class UserCreateAPIView(APIView):
 class ConfirmationAPIView(APIView):
     """
     Класс для получения токена по коду подтверждения `confirmation_code`.
+    Код проверяется и гасится в `ConfirmationSerializer`.
     """
     def post(self, request, *args, **kwargs):
         serializer = ConfirmationSerializer(data=request.data)
         if serializer.is_valid():
-            user = User.objects.get(
-                username=serializer.validated_data['username']
-            )
-            user.confirmation_code = ''
-            user.save(update_fields=['confirmation_code'])
+            user = serializer.validated_data['user']
             return Response(
                 {'token': str(RefreshToken.for_user(user).access_token)},
                 status=status.HTTP_200_OK
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class CacheStatsAPIView(APIView):
+    """
+    Статистика кэша ответов для администраторов: попадания, промахи
+    и доля попаданий по пространствам имен, см. `api.cache`.
+    Счётчики относятся к процессу, обработавшему запрос (`pid`).
+    """
+    permission_classes = (AdminOnlyPermission, )
+
+    def get(self, request):
+        return Response({'pid': os.getpid(), **response_cache.snapshot()})
+
+
+class ExportAPIView(APIView):
+    """
+    Потоковая выгрузка каталога для администраторов.
+    Имя и формат файла задаются в адресе: `export/titles.ndjson`,
+    `export/review.csv`. Раскладка файлов совпадает с `initdata`.
+    """
+    permission_classes = (AdminOnlyPermission, )
+    content_types = {
+        'csv': 'text/csv; charset=utf-8',
+        'ndjson': 'application/x-ndjson; charset=utf-8',
+    }
+
+    def get(self, request, filename, file_format):
+        name = get_export_model_name(filename)
+        if name is None or file_format not in EXPORT_FORMATS:
+            raise NotFound(
+                f'Export file `{filename}.{file_format}` not found.'
+            )
+
+        response = StreamingHttpResponse(
+            EXPORT_FORMATS[file_format](name),
+            content_type=self.content_types[file_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{filename}.{file_format}"'
+        )
+        return response
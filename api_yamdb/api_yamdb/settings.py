@@ -105,13 +105,50 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
     ],
 }
 
+# Общий для процессов одного сервера кэш: в нем хранятся версии кэша
+# ответов api, поэтому ETag условного GET верен при нескольких процессах.
+# Для нескольких серверов замените на общий бэкенд (Redis, Memcached).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Кэш ответов api, см. api/cache.py.
+# SHARED_ALIAS - имя бэкенда из CACHES для общего между процессами уровня,
+# None - только локальный кэш в памяти процесса; ETag условного GET
+# выдается только при общем уровне, см. api/mixins.py.
+# COUNT_ESTIMATE_THRESHOLD - количество объектов в пагинации, выше которого
+# оно считается оценкой и не пересчитывается после каждой записи.
+API_CACHE = {
+    'COUNT_ESTIMATE_THRESHOLD': 10000,
+    'LOCAL_MAX_ENTRIES': 512,
+    'SHARED_ALIAS': 'shared',
+    'TIMEOUT': 300,
+}
+
+# Рейтинги лучших произведений, см. api/leaderboard.py.
+# SIZE - длина рейтинга, SLACK - запас для перестановок без перестроения,
+# PRIOR_WEIGHT - вес средней оценки во взвешенном рейтинге.
+LEADERBOARD = {
+    'PRIOR_WEIGHT': 10,
+    'SIZE': 20,
+    'SLACK': 10,
+    'TIMEOUT': 300,
+}
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
 }
@@ -119,3 +156,26 @@ SIMPLE_JWT = {
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'mailing')
+
+DEFAULT_FROM_EMAIL = 'no_replay@yambd.ru'
+
+# Коды подтверждения, см. reviews/confirmation.py.
+# LENGTH - длина кода; TIMEOUT - срок действия кода в секундах;
+# MAX_ATTEMPTS - сколько неверных попыток ввода допускается.
+CONFIRMATION_CODE = {
+    'LENGTH': 8,
+    'MAX_ATTEMPTS': 5,
+    'TIMEOUT': 24 * 60 * 60,
+}
+
+# Очередь исходящих писем, см. reviews/outbox.py.
+# BACKOFF - задержка первой повторной попытки в секундах, далее удваивается;
+# LEASE - на сколько секунд обработчик арендует выбранную порцию писем;
+# RATE_LIMIT - не больше писем в секунду, 0 - без ограничения.
+MAIL_OUTBOX = {
+    'BACKOFF': 60,
+    'BATCH_SIZE': 100,
+    'LEASE': 300,
+    'MAX_ATTEMPTS': 5,
+    'RATE_LIMIT': 0,
+}
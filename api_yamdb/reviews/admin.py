@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, GenreTitle, Review, Title, User
+from .models import (Category, Comment, Genre, GenreTitle, OutboxMessage,
+                     Review, Title, User)
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -9,6 +10,13 @@ class UserAdmin(admin.ModelAdmin):
     search_fields = ('username', 'role', )
 
 
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts',
+                    'next_attempt_at', )
+    list_filter = ('status', )
+    search_fields = ('recipients', )
+
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Category)
 admin.site.register(Genre)
@@ -16,3 +24,4 @@ admin.site.register(Title)
 admin.site.register(GenreTitle)
 admin.site.register(Review)
 admin.site.register(Comment)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
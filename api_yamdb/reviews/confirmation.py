@@ -0,0 +1,101 @@
+"""
+Коды подтверждения для получения токена.
+
+    Код - короткая случайная строка длиной `LENGTH`, пользователь получает
+    его письмом. В базе хранится только HMAC-SHA256 кода на `SECRET_KEY`
+    (64 символа), срок действия `TIMEOUT` секунд и счётчик неверных
+    попыток: после `MAX_ATTEMPTS` неверных попыток код перестает
+    приниматься, нужно запросить новый.
+
+    Проверка читает пользователя одним запросом по уникальному `username`
+    и сравнивает хэши за постоянное время (`hmac.compare_digest`). Верный
+    код гасится условным UPDATE: при одновременных запросах с одним кодом
+    токен получит только один из них.
+
+    Настройки задаются словарем `CONFIRMATION_CODE` в settings.py.
+"""
+
+import hashlib
+import hmac
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from .models import User
+
+DEFAULT_OPTIONS = {
+    'LENGTH': 8,
+    'MAX_ATTEMPTS': 5,
+    'TIMEOUT': 24 * 60 * 60,
+}
+
+ALLOWED_CHARS = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+
+INVALID = 'Неверный код подтверждения.'
+EXPIRED = 'Срок действия кода подтверждения истёк, запросите новый.'
+EXHAUSTED = 'Превышено число попыток, запросите новый код подтверждения.'
+
+
+def get_options():
+    return {**DEFAULT_OPTIONS, **getattr(settings, 'CONFIRMATION_CODE', {})}
+
+
+def hash_code(code):
+    return hmac.new(
+        settings.SECRET_KEY.encode(), str(code).encode(), hashlib.sha256
+    ).hexdigest()
+
+
+def issue_code(user):
+    """
+    Выдаем пользователю новый код: старый код и счётчик попыток
+    сбрасываются, новый пользователь сохраняется вместе с кодом.
+    Возвращает код в открытом виде для письма.
+    """
+    options = get_options()
+    code = get_random_string(options['LENGTH'], ALLOWED_CHARS)
+    user.confirmation_code = hash_code(code)
+    user.confirmation_code_expires = timezone.now() + timedelta(
+        seconds=options['TIMEOUT']
+    )
+    user.confirmation_attempts = 0
+    if user.pk is None:
+        user.save()
+    else:
+        user.save(update_fields=[
+            'confirmation_code', 'confirmation_code_expires',
+            'confirmation_attempts',
+        ])
+    return code
+
+
+def check_code(user, code):
+    """
+    Проверяем и гасим код пользователя.
+    Возвращает None для верного кода или сообщение об ошибке.
+    """
+    if not user.confirmation_code:
+        return INVALID
+    if user.confirmation_attempts >= get_options()['MAX_ATTEMPTS']:
+        return EXHAUSTED
+    if user.confirmation_code_expires <= timezone.now():
+        return EXPIRED
+
+    if not hmac.compare_digest(user.confirmation_code, hash_code(code)):
+        User.objects.filter(pk=user.pk).update(
+            confirmation_attempts=F('confirmation_attempts') + 1
+        )
+        return INVALID
+
+    if not User.objects.filter(
+        pk=user.pk, confirmation_code=user.confirmation_code
+    ).update(
+        confirmation_code=None,
+        confirmation_code_expires=None,
+        confirmation_attempts=0,
+    ):
+        return INVALID
+    return None
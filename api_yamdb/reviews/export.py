@@ -0,0 +1,150 @@
+"""
+Модуль export используется для потоковой выгрузки каталога.
+
+    Выгрузка повторяет раскладку файлов, которую читает команда
+    `initdata`: те же имена файлов и те же колонки. Строки читаются из
+    базы через `iterator(chunk_size=...)` без кэша результатов, поэтому
+    расход памяти не зависит от размера таблиц.
+
+    Форматы:
+
+    -- csv: файлы в формате `static/data`, пригодные для `initdata`.
+
+    -- ndjson: по одному json объекту на строку. Для произведений
+    дополнительно выгружаются рейтинг, slug категории и список slug жанров.
+
+    Attributes
+    ----------
+    EXPORT_CHUNK_SIZE : int
+        размер порции строк при чтении из базы по умолчанию
+    export_columns : dict
+        колонки файлов выгрузки
+        key : название модели
+        val: кортеж заголовков колонок в формате файлов `initdata`
+    EXPORT_FORMATS : dict
+        функции построчной выгрузки по названию формата
+"""
+
+import csv
+import json
+
+from django.apps import apps
+
+from .management.commands.initdata import DATE_FORMAT, model_file_link
+from .models import GenreTitle
+
+EXPORT_CHUNK_SIZE = 2000
+
+export_columns = {
+    'User': (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    ),
+    'Category': ('id', 'name', 'slug'),
+    'Genre': ('id', 'name', 'slug'),
+    'Title': ('id', 'name', 'year', 'category', 'description'),
+    'GenreTitle': ('id', 'title_id', 'genre_id'),
+    'Review': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'Comment': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+
+
+def get_export_filename(name):
+    """Имя файла выгрузки модели без расширения, как в `initdata`"""
+    return model_file_link.get(name, name).lower()
+
+
+def get_export_model_name(filename):
+    """Название модели по имени файла выгрузки, None если не найдено"""
+    for name in export_columns:
+        if get_export_filename(name) == filename:
+            return name
+    return None
+
+
+def format_value(value):
+    """Приводим значение к виду файлов загрузки"""
+    if hasattr(value, 'strftime'):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+
+def iter_records(name, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Построчно читаем модель из базы.
+    Возвращает генератор словарей, ключи которых это заголовки колонок.
+    """
+    model = apps.get_model('reviews', name)
+    headers = export_columns[name]
+    attnames = [
+        model._meta.get_field(
+            header[:-3] if header.endswith('_id') else header
+        ).attname
+        for header in headers
+    ]
+    rows = model.objects.order_by('pk').values_list(*attnames)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield dict(zip(headers, map(format_value, row)))
+
+
+def iter_title_records(chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Построчно читаем произведения вместе с рейтингом, категорией
+    и жанрами. Жанры порции подгружаются одним запросом `IN`.
+    """
+    titles = apps.get_model('reviews', 'Title').objects.order_by('pk').values(
+        'id', 'name', 'year', 'description', 'category__slug', 'rating',
+    ).iterator(chunk_size=chunk_size)
+
+    chunk = []
+    for title in titles:
+        chunk.append(title)
+        if len(chunk) == chunk_size:
+            yield from enrich_titles(chunk)
+            chunk = []
+    yield from enrich_titles(chunk)
+
+
+def enrich_titles(chunk):
+    """Добавляем к порции произведений жанры и slug категории"""
+    genres = {}
+    links = GenreTitle.objects.filter(
+        title_id__in=[title['id'] for title in chunk]
+    ).values_list('title_id', 'genre__slug')
+    for title_id, slug in links:
+        genres.setdefault(title_id, []).append(slug)
+
+    for title in chunk:
+        title['category'] = title.pop('category__slug')
+        title['genre'] = genres.get(title['id'], [])
+        yield title
+
+
+class Echo:
+    """Псевдо-буфер для `csv.writer`: возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(name, chunk_size=EXPORT_CHUNK_SIZE):
+    """Генератор строк csv файла модели вместе с заголовком"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(export_columns[name])
+    for record in iter_records(name, chunk_size):
+        yield writer.writerow(record.values())
+
+
+def ndjson_lines(name, chunk_size=EXPORT_CHUNK_SIZE):
+    """Генератор строк ndjson файла модели"""
+    if name == 'Title':
+        records = iter_title_records(chunk_size)
+    else:
+        records = iter_records(name, chunk_size)
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': csv_lines,
+    'ndjson': ndjson_lines,
+}
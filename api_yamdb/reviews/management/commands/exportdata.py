@@ -0,0 +1,83 @@
+"""
+Модуль exportdata выгружает каталог в файлы, которые читает `initdata`.
+
+    python manage.py exportdata
+
+    Выгружает все модели из `ordered_load_models` в каталог `--output`
+    (по умолчанию `static/data/export/`) в формате csv.
+
+    python manage.py exportdata --models Title Review --format ndjson
+
+    Выгружает перечисленные модели в формате ndjson. Для произведений
+    в ndjson добавляются рейтинг, категория и жанры.
+
+    Строки читаются из базы порциями `--chunk-size` и сразу пишутся
+    в файл, расход памяти не зависит от размера таблиц.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from reviews.export import (EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_columns,
+                            get_export_filename)
+
+from api_yamdb.settings import STATICFILES_DIRS
+
+from .initdata import ordered_load_models
+
+
+class Command(BaseCommand):
+    """Класс менеджмент команды выгрузки каталога"""
+    help = 'Exports catalogue data in the initdata file layout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', nargs='+', type=str, default='--all')
+        parser.add_argument(
+            '--format',
+            choices=tuple(EXPORT_FORMATS),
+            default='csv',
+            dest='file_format',
+        )
+        parser.add_argument(
+            '--output',
+            default=os.path.join(STATICFILES_DIRS[0], 'data', 'export'),
+            help='Directory for exported files'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Rows fetched from the database per round trip'
+        )
+
+    def handle(self, *args, **options):
+        source = options['models']
+        if options['models'] == '--all':
+            source = ordered_load_models
+
+        file_format = options['file_format']
+        lines = EXPORT_FORMATS[file_format]
+        os.makedirs(options['output'], exist_ok=True)
+
+        for name in source:
+            if name not in export_columns:
+                raise CommandError(f'Model `{name}` can`t be exported.')
+
+            file = os.path.join(
+                options['output'],
+                f'{get_export_filename(name)}.{file_format}'
+            )
+            count = 0
+            with open(file, 'w', encoding='utf-8', newline='') as f:
+                for line in lines(name, options['chunk_size']):
+                    f.write(line)
+                    count += 1
+
+            if file_format == 'csv':
+                count -= 1
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Successfully export model `{name}`, '
+                    f'{count} row to {file}.'
+                )
+            )
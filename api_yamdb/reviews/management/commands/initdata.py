@@ -31,6 +31,38 @@
         перезагрузки моделей. Можно очистить руками таблицу базы данных и
         загрузить заново в нее данные по средствам команды описанной выше.
 
+    -- с параметром --bulk
+
+    python manage.py initdata --bulk --chunk-size 5000
+
+    Быстрый режим для загрузки больших дампов в пустую базу. Строки файла
+    читаются потоком порциями по `--chunk-size`, связанные поля
+    загружаются сырыми значениями `<field>_id` и проверяются одним
+    запросом `IN` на порцию, порция вставляется через `bulk_create`
+    в отдельной транзакции. Выводится скорость загрузки, строк в секунду.
+
+    Note:
+        `bulk_create` не вызывает сигналы моделей, поэтому после загрузки
+        отзывов рейтинг произведений, а после загрузки комментариев
+        количество комментариев отзывов пересчитываются отдельно.
+        Поисковые индексы загруженных моделей пересобираются.
+
+    -- с параметром --jobs
+
+    python manage.py initdata --bulk --jobs 4
+
+    Модели загружаются в пуле из N процессов, каждый со своим соединением
+    с базой. Порядок строится по графу внешних ключей моделей: модель
+    запускается, как только загружены все модели, от которых она зависит,
+    поэтому `User`, `Category` и `Genre` загружаются одновременно.
+    В конце выводится время загрузки каждой модели.
+
+    Note:
+        Процессы пула создаются через `fork`. SQLite допускает только
+        одного пишущего одновременно, поэтому на нем записи процессов
+        сериализуются блокировкой, а параллельно выполняются разбор
+        файлов и подготовка строк.
+
     Attributes
     ----------
     STATICFILES_DIRS : str
@@ -51,6 +83,14 @@
     ordered_load_models: tuple
         УпорядоченныйкКортеж с названиями моделей для загрузки, может быть
         расширен в случае появления дополнительных моделей в проект.
+    DATE_FORMAT : str
+        формат дат в файлах загрузки
+    DEFAULT_CHUNK_SIZE : int
+        размер порции строк по умолчанию для режима --bulk
+    RELATED_CACHE_SIZE : int
+        максимальное количество связанных объектов в LRU кэше
+    write_lock : multiprocessing.Lock
+        блокировка записи процессов пула при загрузке в SQLite
 
     Methods
     -------
@@ -60,22 +100,62 @@
     get_model_csv_filename(name)
         получает имя файла для загрузки модели.
 
-    create_kwargs(headers, row)
-        получает заголовок csv файла с именами полей и текущую строку
-        со значениями. Если заголовок поля файла это модель, то получает
-        значение связанной модели, елси дата, то преобразует в формат
-        datetime.datetime.
+    parse_date(value)
+        преобразует строку даты из файла в datetime.datetime с таймзоной UTC.
+
+    build_column_plan(model, headers)
+        строит план загрузки колонок один раз на файл по заголовку csv
+        и полям модели: имя поля модели, функцию преобразования значения
+        и связанную модель, если поле файла это внешний ключ.
+
+    get_related(model, pk)
+        получает связанный объект по первичному ключу. Результаты хранятся
+        в ограниченном LRU кэше размером `RELATED_CACHE_SIZE`, поэтому
+        повторные ссылки на тот же объект не обращаются к базе.
+
+    create_kwargs(plan, row)
+        получает план колонок файла и текущую строку со значениями.
+        Если колонка это связанная модель, то получает объект связанной
+        модели, елси дата, то преобразует в формат datetime.datetime.
 
         Возвращает словарь, где ключи соответствуют названиям полей модели,
         а значения значениям для загрузки в модель.
+
+    get_bulk_columns(model, headers)
+        сопоставляет заголовок csv файла с полями модели для режима --bulk.
+
+    check_related(columns, objects)
+        проверяет одним запросом на связанную модель, что все значения
+        внешних ключей порции существуют в базе.
+
+    bulk_load_model(model, file, chunk_size)
+        загружает файл в модель порциями через `bulk_create`.
+
+    load_model_rows(model, file)
+        загружает файл в модель построчно через `update_or_create`.
+
+    load_model(name, bulk, chunk_size)
+        загружает одну модель и возвращает количество строк и время.
+
+    get_dependencies(names)
+        строит граф зависимостей загружаемых моделей по внешним ключам.
 """
 
 import csv
 import datetime
+import itertools
+import multiprocessing
 import os.path
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
 
 import pytz
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from reviews.models import Comment, Review, Title
+from reviews.search import search_indexes
 
 from api_yamdb.settings import STATICFILES_DIRS
 
@@ -94,6 +174,14 @@ model_fields_link = {
 
 date_name_fields = ['pub_date']
 
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+DEFAULT_CHUNK_SIZE = 5000
+
+RELATED_CACHE_SIZE = 10000
+
+write_lock = None
+
 ordered_load_models = (
     'User', 'Category', 'Genre',
     'Title', 'GenreTitle', 'Review', 'Comment'
@@ -140,37 +228,243 @@ def get_model_csv_filename(name):
     return file_path if os.path.isfile(file_path) else None
 
 
-def create_kwargs(headers, row):
-    """
-    Создаем словарь из строки файла с параметрами загрузки.
-    Ключи это поля модели. Значения это значения для установки в модель.
+def parse_date(value):
+    """Преобразуем строку даты из файла в datetime с таймзоной UTC"""
+    date = datetime.datetime.strptime(value, DATE_FORMAT)
+    return pytz.utc.localize(date)
+
 
+def build_column_plan(model, headers):
     """
-    kwargs = {'id': headers[0]}
+    Строим план загрузки по заголовку csv файла, один раз на файл.
 
-    for count, value in enumerate(row):
-        title = headers[count]
+    Возвращает список кортежей (field_name, converter, related_model)
+    в порядке колонок файла, где `converter` - функция преобразования
+    значения, `related_model` - связанная модель или None.
+    """
+    plan = []
+    for title in headers:
         if title.endswith('_id'):
             title = title[:-3]
 
-        model = get_model(title.capitalize())
-        kwargs[title] = value
-
+        field = model._meta.get_field(title)
+        related_model = field.related_model if field.is_relation else None
+        converter = field.to_python
         if title in date_name_fields:
-            frmt = "%Y-%m-%dT%H:%M:%S.%fZ"
-            date = datetime.datetime.strptime(value, frmt)
-            kwargs[title] = pytz.utc.localize(date)
+            converter = parse_date
+        plan.append((title, converter, related_model))
+
+    return plan
 
+
+@lru_cache(maxsize=RELATED_CACHE_SIZE)
+def get_related(model, pk):
+    """Получаем связанный объект, результат кэшируется по (model, pk)"""
+    try:
+        return model.objects.get(pk=pk)
+    except model.DoesNotExist:
+        raise CommandError(
+            f'Related model `{model.__name__}` does not exist '
+            f'element id={pk}'
+        )
+
+
+def create_kwargs(plan, row):
+    """
+    Создаем словарь из строки файла с параметрами загрузки.
+    Ключи это поля модели. Значения это значения для установки в модель.
+    Пустая ячейка внешнего ключа (например категория удалена) это None.
+    """
+    kwargs = {}
+
+    for (title, converter, model), value in zip(plan, row):
         if model:
+            value = get_related(model, int(value)) if value else None
+        else:
+            value = converter(value)
+        kwargs[title] = value
+
+    return kwargs
+
+
+@contextmanager
+def write_transaction():
+    """
+    Транзакция записи в базу.
+    При загрузке в пуле процессов над SQLite записи процессов
+    сериализуются общей блокировкой `write_lock`: SQLite допускает
+    одного пишущего, а транзакция, начатая с чтения, при конкурентной
+    записи сразу завершается ошибкой `database is locked`.
+    """
+    with write_lock or nullcontext():
+        with transaction.atomic():
+            yield
+
+
+def get_bulk_columns(model, headers):
+    """
+    Сопоставляем заголовки csv файла с полями модели для режима --bulk.
+    Связанные поля загружаются сырыми значениями в `<field>_id`.
+
+    Возвращает список кортежей (attname, field) в порядке колонок файла.
+    """
+    columns = []
+    for title in headers:
+        name = title[:-3] if title.endswith('_id') else title
+        field = model._meta.get_field(name)
+        columns.append((field.attname, field))
+    return columns
+
+
+def convert_value(field, value):
+    """Преобразуем значение ячейки файла для поля модели"""
+    if field.is_relation:
+        return int(value) if value else None
+    if field.name in date_name_fields:
+        return parse_date(value)
+    return value
+
+
+def check_related(columns, objects):
+    """
+    Проверяем, что все внешние ключи порции объектов существуют.
+    На каждую связанную модель выполняется один запрос `IN`
+    (с разбиением по лимиту параметров запроса базы данных).
+    """
+    for attname, field in columns:
+        if not field.is_relation:
+            continue
+
+        ids = list({getattr(obj, attname) for obj in objects} - {None})
+        batch_size = connection.features.max_query_params or len(ids) or 1
+        found = set()
+        for start in range(0, len(ids), batch_size):
+            found.update(
+                field.related_model.objects.filter(
+                    pk__in=ids[start:start + batch_size]
+                ).values_list('pk', flat=True)
+            )
+
+        missing = set(ids) - found
+        if missing:
+            raise CommandError(
+                f'Related model `{field.name}` does not exist '
+                f'elements id={sorted(missing)}'
+            )
+
+
+def bulk_load_model(model, file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Загружаем файл в модель порциями по `chunk_size` строк.
+    Каждая порция проверяется и вставляется через `bulk_create`
+    в отдельной транзакции. Возвращает количество загруженных строк.
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        columns = get_bulk_columns(model, next(reader))
+        count = 0
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                break
+
+            objects = [
+                model(**{
+                    attname: convert_value(field, value)
+                    for (attname, field), value in zip(columns, row)
+                })
+                for row in rows
+            ]
+            with write_transaction():
+                check_related(columns, objects)
+                model.objects.bulk_create(objects)
+            count += len(objects)
+
+    return count
+
+
+def load_model_rows(model, file):
+    """
+    Загружаем файл в модель построчно через `update_or_create`.
+    Возвращает количество загруженных строк.
+    """
+    count = 0
+    with open(file, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        plan = build_column_plan(model, next(reader))
+        for row in reader:
+            kwargs = create_kwargs(plan, row)
+
             try:
-                kwargs[title] = model.objects.get(pk=int(value))
-            except model.DoesNotExist:
+                with write_transaction():
+                    model.objects.update_or_create(
+                        id=kwargs['id'], defaults=kwargs
+                    )
+            except Exception:
                 raise CommandError(
-                    f'Related model `{title}` does not exist '
-                    f'element id={value}'
+                    'Can`t create model "%s"' % model.__name__
                 )
+            count += 1
 
-    return kwargs
+    return count
+
+
+def load_model(name, bulk=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Загружаем одну модель из ее файла.
+    Функция верхнего уровня, чтобы ее можно было выполнять в пуле процессов.
+
+    Возвращает кортеж (name, count, seconds).
+    """
+    model = get_model(name)
+    file = get_model_csv_filename(name)
+    started = time.monotonic()
+
+    if bulk:
+        count = bulk_load_model(model, file, chunk_size)
+        if model is Review:
+            with write_transaction():
+                Title.objects.all().update_rating()
+        if model is Comment:
+            with write_transaction():
+                Review.objects.all().update_comment_count()
+        if name in search_indexes:
+            with write_transaction():
+                search_indexes[name].rebuild()
+    else:
+        count = load_model_rows(model, file)
+
+    return name, count, time.monotonic() - started
+
+
+def get_dependencies(names):
+    """
+    Строим граф зависимостей моделей по их внешним ключам.
+
+    Возвращает словарь, где ключ это название модели, а значение
+    множество названий моделей из `names`, которые надо загрузить раньше.
+    """
+    models = {get_model(name): name for name in names}
+    return {
+        name: {
+            models[field.related_model]
+            for field in model._meta.fields
+            if field.many_to_one
+            and field.related_model in models
+            and field.related_model is not model
+        }
+        for model, name in models.items()
+    }
+
+
+def init_worker(lock):
+    """
+    Инициализатор процесса пула: каждый процесс открывает свое соединение
+    с базой и получает общую блокировку записи.
+    """
+    global write_lock
+    write_lock = lock
+    connections.close_all()
 
 
 class Command(BaseCommand):
@@ -179,6 +473,23 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser):
         parser.add_argument('--models', nargs='+', type=str, default='--all')
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Insert rows with bulk_create, for loading into empty tables'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Rows per transaction in --bulk mode'
+        )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Load independent models concurrently in N processes'
+        )
 
     def handle(self, *args, **options):
 
@@ -186,6 +497,9 @@ class Command(BaseCommand):
         if options['models'] == '--all':
             source = ordered_load_models
 
+        get_related.cache_clear()
+
+        names = []
         for name in source:
             model = get_model(name)
             file = get_model_csv_filename(name)
@@ -196,22 +510,71 @@ class Command(BaseCommand):
                     )
                 )
                 continue
-
-            with open(file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                headers = next(reader)
-                for count, row in enumerate(reader):
-                    kwargs = create_kwargs(headers, row)
-
-                    try:
-                        model.objects.update_or_create(
-                            id=kwargs['id'], defaults=kwargs
-                        )
-                    except Exception:
-                        raise CommandError('Can`t create model "%s"' % name)
-
+            names.append(name)
+
+        load_kwargs = {
+            'bulk': options['bulk'],
+            'chunk_size': options['chunk_size'],
+        }
+        if options['jobs'] > 1:
+            results = self.load_parallel(names, options['jobs'], load_kwargs)
+        else:
+            results = []
+            for name in names:
+                results.append(load_model(name, **load_kwargs))
+                self.report(*results[-1])
+
+        self.stdout.write('Timing summary:')
+        for name, count, seconds in results:
             self.stdout.write(
-                self.style.SUCCESS(
-                    f'Successfully load model `{name}`, '
-                    f'create {count + 1} row in database.')
+                f'  {name:<12} {count:>10} rows {seconds:>9.2f}s'
+            )
+
+    def load_parallel(self, names, jobs, load_kwargs):
+        """
+        Загружаем модели в пуле процессов.
+        Модель отправляется в пул, как только загружены все модели,
+        от которых она зависит. Независимые модели грузятся одновременно.
+        """
+        pending = get_dependencies(names)
+        done = set()
+        futures = {}
+        results = []
+
+        context = multiprocessing.get_context('fork')
+        lock = context.Lock() if connection.vendor == 'sqlite' else None
+        connections.close_all()
+        executor = ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(lock, ),
+        )
+        with executor:
+            while pending or futures:
+                ready = [
+                    name for name, parents in pending.items()
+                    if parents <= done
+                ]
+                for name in ready:
+                    del pending[name]
+                    future = executor.submit(load_model, name, **load_kwargs)
+                    futures[future] = name
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done.add(futures.pop(future))
+                    results.append(future.result())
+                    self.report(*results[-1])
+
+        return results
+
+    def report(self, name, count, seconds):
+        """Сообщение об успешной загрузке модели"""
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully load model `{name}`, '
+                f'create {count} row in database '
+                f'in {seconds:.2f}s ({count / (seconds or 1):.0f} rows/sec).'
             )
+        )
@@ -0,0 +1,27 @@
+"""
+Модуль rebuildrating пересчитывает хранимый рейтинг произведений.
+
+    python manage.py rebuildrating
+
+    Сумма оценок и количество отзывов (`Title.rating_sum`,
+    `Title.review_count`) заново вычисляются по таблице отзывов
+    одним UPDATE-запросом.
+    Применяется после массовой загрузки данных в обход моделей
+    или для исправления расхождений.
+"""
+
+from django.core.management.base import BaseCommand
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """Класс менеджмент команды пересчёта рейтинга произведений"""
+    help = 'Rebuilds stored rating of titles from reviews'
+
+    def handle(self, *args, **options):
+        count = Title.objects.all().update_rating()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully rebuild rating of {count} titles.'
+            )
+        )
@@ -0,0 +1,42 @@
+"""
+Модуль rebuildsearch пересобирает полнотекстовые индексы FTS5.
+
+    python manage.py rebuildsearch
+
+    Пересобирает индексы всех моделей из `reviews.search.search_indexes`.
+
+    python manage.py rebuildsearch --models Title
+
+    Пересобирает индексы перечисленных моделей.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from reviews.search import search_indexes
+
+
+class Command(BaseCommand):
+    """Класс менеджмент команды пересборки поисковых индексов"""
+    help = 'Rebuilds full-text search indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', nargs='+', type=str, default='--all')
+
+    def handle(self, *args, **options):
+        source = options['models']
+        if options['models'] == '--all':
+            source = search_indexes
+
+        for name in source:
+            index = search_indexes.get(name)
+            if index is None:
+                raise CommandError(f'Model `{name}` has no search index.')
+
+            with transaction.atomic():
+                count = index.rebuild()
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Successfully rebuild search index `{index.table}`, '
+                    f'{count} rows.'
+                )
+            )
@@ -0,0 +1,61 @@
+"""
+Модуль reconcilecounters исправляет расхождения хранимых счётчиков.
+
+    python manage.py reconcilecounters
+
+    Находит произведения, у которых сумма оценок или количество отзывов
+    (`Title.rating_sum`, `Title.review_count`) расходятся с таблицей
+    отзывов, и отзывы, у которых количество комментариев
+    (`Review.comment_count`) расходится с таблицей комментариев.
+    Пересчитываются только расходящиеся строки, порциями по `--batch-size`.
+
+    python manage.py reconcilecounters --dry-run
+
+    Только сообщает количество расходящихся строк.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from reviews.models import Review, Title
+
+DEFAULT_BATCH_SIZE = 500
+
+counter_updates = {
+    Title: 'update_rating',
+    Review: 'update_comment_count',
+}
+
+
+class Command(BaseCommand):
+    """Класс менеджмент команды сверки счётчиков"""
+    help = 'Repairs drifted review and comment counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        for model in counter_updates:
+            drifted = list(
+                model.objects.drifted().values_list('pk', flat=True)
+            )
+            if not options['dry_run']:
+                self.repair(model, drifted, options['batch_size'])
+
+            action = 'found' if options['dry_run'] else 'repaired'
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{model.__name__}: {len(drifted)} drifted rows {action}.'
+                )
+            )
+
+    @staticmethod
+    def repair(model, pks, batch_size):
+        for start in range(0, len(pks), batch_size):
+            queryset = model.objects.filter(
+                pk__in=pks[start:start + batch_size]
+            )
+            with transaction.atomic():
+                getattr(queryset, counter_updates[model])()
@@ -0,0 +1,55 @@
+"""
+Модуль sendoutbox отправляет письма из очереди `OutboxMessage`.
+
+    python manage.py sendoutbox
+
+    Разбирает очередь порциями по одному соединению с почтовым бэкендом
+    и завершается, когда писем к отправке не осталось.
+
+    python manage.py sendoutbox --loop --interval 5
+
+    Режим обработчика: после разбора очереди ждет `--interval` секунд
+    и повторяет. Повторные попытки и dead letter см. в `reviews.outbox`.
+
+    python manage.py sendoutbox --rate-limit 10
+
+    Не больше 10 писем в секунду. Выводится пропускная способность.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from reviews.outbox import drain, get_options
+
+
+class Command(BaseCommand):
+    """Класс менеджмент команды отправки писем из очереди"""
+    help = 'Sends queued outbound mail'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--rate-limit', type=float)
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--interval', type=float, default=5)
+
+    def handle(self, *args, **options):
+        outbox_options = get_options()
+        if options['batch_size']:
+            outbox_options['BATCH_SIZE'] = options['batch_size']
+        if options['rate_limit'] is not None:
+            outbox_options['RATE_LIMIT'] = options['rate_limit']
+
+        while True:
+            dispatcher = drain(outbox_options)
+            if dispatcher.sent or dispatcher.failed or not options['loop']:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f'Sent {dispatcher.sent} messages, '
+                        f'{dispatcher.failed} failed in '
+                        f'{dispatcher.elapsed:.2f} s '
+                        f'({dispatcher.throughput:.1f} msg/s).'
+                    )
+                )
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE reviews_title_fts USING fts5("
+                "name, description, prefix='2 3 4', "
+                "tokenize='unicode61 remove_diacritics 2')",
+                "INSERT INTO reviews_title_fts (rowid, name, description) "
+                "SELECT id, name, COALESCE(description, '') "
+                "FROM reviews_title",
+            ],
+            reverse_sql='DROP TABLE reviews_title_fts',
+        ),
+    ]
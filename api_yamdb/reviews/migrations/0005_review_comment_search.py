@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_title_search'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE reviews_review_fts USING fts5("
+                "text, prefix='2 3 4', "
+                "tokenize='unicode61 remove_diacritics 2')",
+                "INSERT INTO reviews_review_fts (rowid, text) "
+                "SELECT id, text FROM reviews_review",
+            ],
+            reverse_sql='DROP TABLE reviews_review_fts',
+        ),
+        migrations.RunSQL(
+            sql=[
+                "CREATE VIRTUAL TABLE reviews_comment_fts USING fts5("
+                "text, prefix='2 3 4', "
+                "tokenize='unicode61 remove_diacritics 2')",
+                "INSERT INTO reviews_comment_fts (rowid, text) "
+                "SELECT id, text FROM reviews_comment",
+            ],
+            reverse_sql='DROP TABLE reviews_comment_fts',
+        ),
+    ]
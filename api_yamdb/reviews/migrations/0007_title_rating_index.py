@@ -0,0 +1,59 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:33
+
+from django.db import migrations, models
+from django.db.models import F, FloatField, IntegerField
+from django.db.models.functions import Cast, Floor, Mod, NullIf
+
+
+def fill_rating(apps, schema_editor):
+    # Копия `reviews.models.rating_expression` на момент миграции:
+    # средняя оценка с округлением половины к чётному, как `round()`.
+    Title = apps.get_model('reviews', 'Title')
+    quotient = Cast(
+        Floor(
+            Cast(F('rating_sum'), FloatField()) / NullIf(F('review_count'), 0)
+        ),
+        IntegerField()
+    )
+    remainder = F('rating_sum') - quotient * F('review_count')
+    Title.objects.update(
+        rating=quotient + Cast(
+            Floor(
+                Cast(2 * remainder + Mod(quotient, 2), FloatField())
+                / (F('review_count') + 1)
+            ),
+            IntegerField()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.PositiveSmallIntegerField(editable=False, help_text='Средняя оценка, округлённая до целого', null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(fill_rating, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['rating'], name='title_rating'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name'], name='title_name'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['review_count'], name='title_review_count'),
+        ),
+    ]
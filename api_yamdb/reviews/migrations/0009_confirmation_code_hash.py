@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+def drop_codes(apps, schema_editor):
+    # Старые коды - JWT в открытом виде, длиннее нового столбца.
+    User = apps.get_model('reviews', 'User')
+    User.objects.exclude(confirmation_code=None).update(
+        confirmation_code=None
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_outbox'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_codes, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_attempts',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Неверных попыток ввода кода'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='confirmation_code_expires',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Код подтверждения действует до'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='confirmation_code',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='Код подтверждения'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_confirmation_code_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentSearch',
+            fields=[
+                ('rank', models.FloatField()),
+                ('comment', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.Comment')),
+                ('document', reviews.models.SearchDocumentField(db_column='reviews_comment_fts')),
+            ],
+            options={
+                'db_table': 'reviews_comment_fts',
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReviewSearch',
+            fields=[
+                ('rank', models.FloatField()),
+                ('review', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.Review')),
+                ('document', reviews.models.SearchDocumentField(db_column='reviews_review_fts')),
+            ],
+            options={
+                'db_table': 'reviews_review_fts',
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TitleSearch',
+            fields=[
+                ('rank', models.FloatField()),
+                ('title', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='reviews.Title')),
+                ('document', reviews.models.SearchDocumentField(db_column='reviews_title_fts')),
+            ],
+            options={
+                'db_table': 'reviews_title_fts',
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, FloatField, OuterRef, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, Floor, Mod, NullIf
 from django.utils import timezone
 
 SLICE_REVIEW = 30
@@ -9,7 +11,8 @@ SLICE_REVIEW = 30
 class User(AbstractUser):
     """
     Кастомная модель пользователя.
-    Доп.поля: Био, Роль, Код подтверждения.
+    Доп.поля: Био, Роль, Код подтверждения (хэш, срок действия и
+    счётчик попыток, см. reviews/confirmation.py).
     Методы: is_moderator, is_admin
     """
     USER = 'user'
@@ -32,11 +35,21 @@ class User(AbstractUser):
         default=USER,
         db_index=True
     )
-    confirmation_code = models.TextField(
+    confirmation_code = models.CharField(
         'Код подтверждения',
+        max_length=64,
         null=True,
         blank=True,
     )
+    confirmation_code_expires = models.DateTimeField(
+        'Код подтверждения действует до',
+        null=True,
+        blank=True,
+    )
+    confirmation_attempts = models.PositiveSmallIntegerField(
+        'Неверных попыток ввода кода',
+        default=0,
+    )
 
     class Meta:
         verbose_name = 'Пользователь'
@@ -93,8 +106,83 @@ class Genre(models.Model):
         return self.slug
 
 
+def rating_expression(rating_sum, review_count):
+    """
+    SQL выражение средней оценки, округлённой до целого как `round()`
+    в Python: половина округляется к чётному (4.5 -> 4, 3.5 -> 4).
+    Без отзывов (деление на NULL) рейтинг равен NULL.
+
+    Для целых s / n с частным q и остатком r к q добавляется единица,
+    если 2r > n или 2r == n при нечётном q, то есть если
+    (2r + q mod 2) / (n + 1) не меньше единицы.
+    """
+    quotient = Cast(
+        Floor(Cast(rating_sum, FloatField()) / NullIf(review_count, 0)),
+        models.IntegerField()
+    )
+    remainder = rating_sum - quotient * review_count
+    return quotient + Cast(
+        Floor(
+            Cast(2 * remainder + Mod(quotient, 2), FloatField())
+            / (review_count + 1)
+        ),
+        models.IntegerField()
+    )
+
+
+class TitleQuerySet(models.QuerySet):
+    """QuerySet произведений с пересчётом хранимого рейтинга"""
+
+    def update_rating(self):
+        """
+        Пересчитывает сумму оценок и количество отзывов по таблице отзывов
+        одним UPDATE-запросом, затем по ним хранимый рейтинг.
+        Возвращает количество обновлённых строк.
+        """
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('id')).values('total')),
+                0
+            ),
+        )
+        return self.update(
+            rating=rating_expression(F('rating_sum'), F('review_count'))
+        )
+
+    def drifted(self):
+        """Произведения, у которых хранимые счётчики расходятся с отзывами"""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.annotate(
+            actual_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            actual_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('id')).values('total')),
+                0
+            ),
+        ).exclude(
+            rating_sum=F('actual_sum'), review_count=F('actual_count')
+        )
+
+
 class Title(models.Model):
-    """Модель для работы с произведениями"""
+    """
+    Модель для работы с произведениями.
+    Сумма оценок, количество отзывов и рейтинг хранятся в самой модели
+    и поддерживаются сигналами отзывов, см. `reviews.signals`.
+    Рейтинг, год, название и количество отзывов проиндексированы
+    для фильтрации и сортировки.
+    """
     name = models.CharField(
         max_length=256,
         verbose_name='Название произведения',
@@ -110,10 +198,35 @@ class Title(models.Model):
         verbose_name='Категория',
         help_text='Укажите категорию произведения'
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    rating = models.PositiveSmallIntegerField(
+        'Рейтинг',
+        null=True,
+        editable=False,
+        help_text='Средняя оценка, округлённая до целого'
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name',)
 
+        indexes = [
+            models.Index(fields=['rating'], name='title_rating'),
+            models.Index(fields=['year'], name='title_year'),
+            models.Index(fields=['name'], name='title_name'),
+            models.Index(fields=['review_count'], name='title_review_count'),
+        ]
+
     def __str__(self):
         return self.name[:SLICE_REVIEW]
 
@@ -142,8 +255,38 @@ class GenreTitle(models.Model):
         return f'{self.title} {self.genre}'
 
 
+class ReviewQuerySet(models.QuerySet):
+    """QuerySet отзывов с пересчётом хранимого количества комментариев"""
+
+    def comments_subquery(self):
+        comments = Comment.objects.filter(
+            review=OuterRef('pk')
+        ).order_by().values('review')
+        return Coalesce(
+            Subquery(comments.annotate(total=Count('id')).values('total')),
+            0
+        )
+
+    def update_comment_count(self):
+        """
+        Пересчитывает количество комментариев по таблице комментариев
+        одним UPDATE-запросом. Возвращает количество обновлённых строк.
+        """
+        return self.update(comment_count=self.comments_subquery())
+
+    def drifted(self):
+        """Отзывы, у которых хранимое количество комментариев расходится"""
+        return self.annotate(
+            actual_count=self.comments_subquery()
+        ).exclude(comment_count=F('actual_count'))
+
+
 class Review(models.Model):
-    """Модель для работы с отзывами на произведения"""
+    """
+    Модель для работы с отзывами на произведения.
+    Количество комментариев хранится в самой модели и поддерживается
+    сигналами комментариев, см. `reviews.signals`.
+    """
 
     score = models.PositiveSmallIntegerField(
         default=None,
@@ -174,6 +317,13 @@ class Review(models.Model):
         'Дата отзыва',
         default=timezone.now,
     )
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = ReviewQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
@@ -182,6 +332,10 @@ class Review(models.Model):
 
         indexes = [
             models.Index(fields=['author', 'title'], name='author_title'),
+            models.Index(
+                fields=['title', '-pub_date', 'id'],
+                name='review_title_pub_date'
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -193,6 +347,14 @@ class Review(models.Model):
     def __str__(self):
         return self.text[:SLICE_REVIEW]
 
+    def save(self, *args, **kwargs):
+        """
+        Сохраняем отзыв в одной транзакции с обновлением рейтинга
+        произведения в сигналах `post_save`.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель для работы с комментариями на отзывы"""
@@ -218,5 +380,149 @@ class Comment(models.Model):
         ordering = ('-pub_date',)
         verbose_name = 'Комментарий'
 
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', 'id'],
+                name='comment_review_pub_date'
+            ),
+        ]
+
     def __str__(self):
         return self.text[:SLICE_REVIEW]
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняем комментарий в одной транзакции с обновлением
+        количества комментариев отзыва в сигналах `post_save`.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class OutboxMessage(models.Model):
+    """
+    Исходящее письмо в очереди отправки.
+    Вью только ставят письма в очередь (`reviews.outbox.enqueue_mail`),
+    отправляет их команда `python manage.py sendoutbox`.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+    STATUSES = (
+        (PENDING, 'pending'),
+        (SENT, 'sent'),
+        (DEAD, 'dead'),
+    )
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.CharField('Отправитель', max_length=254)
+    recipients = models.TextField(
+        'Получатели',
+        help_text='Адреса через запятую'
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now,
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('pk',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outbox_status_next_attempt'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipients}'
+
+
+class Match(models.Lookup):
+    """Полнотекстовое условие FTS5: `<колонка> MATCH <запрос>`"""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class SearchDocumentField(models.TextField):
+    """
+    Скрытая колонка FTS5 с именем самой таблицы: условие `match` по ней
+    ищет по всем колонкам индекса и не зависит от псевдонима таблицы.
+    """
+
+
+SearchDocumentField.register_lookup(Match)
+
+
+class SearchEntry(models.Model):
+    """
+    Строка полнотекстового индекса FTS5 (виртуальная таблица, см.
+    `reviews.search`): `rowid` совпадает с первичным ключом объекта,
+    `rank` - релевантность `bm25`, меньше - лучше. Таблицы создаются
+    миграциями, модели только читают их через JOIN.
+    """
+    rank = models.FloatField()
+
+    class Meta:
+        abstract = True
+        managed = False
+
+
+class TitleSearch(SearchEntry):
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry',
+    )
+    document = SearchDocumentField(db_column='reviews_title_fts')
+
+    class Meta(SearchEntry.Meta):
+        db_table = 'reviews_title_fts'
+
+
+class ReviewSearch(SearchEntry):
+    review = models.OneToOneField(
+        Review,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry',
+    )
+    document = SearchDocumentField(db_column='reviews_review_fts')
+
+    class Meta(SearchEntry.Meta):
+        db_table = 'reviews_review_fts'
+
+
+class CommentSearch(SearchEntry):
+    comment = models.OneToOneField(
+        Comment,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry',
+    )
+    document = SearchDocumentField(db_column='reviews_comment_fts')
+
+    class Meta(SearchEntry.Meta):
+        db_table = 'reviews_comment_fts'
@@ -0,0 +1,201 @@
+"""
+Очередь исходящих писем (outbox).
+
+    Вью не отправляют письма сами, а ставят их в очередь функцией
+    `enqueue_mail`: время ответа не зависит от почтового сервера.
+    Очередь разбирает команда `python manage.py sendoutbox` порциями
+    по одному постоянному соединению с почтовым бэкендом через
+    `MailDispatcher`: не больше `RATE_LIMIT` писем в секунду (0 - без
+    ограничения), со счётчиками пропускной способности.
+
+    Выбранная порция «арендуется» на `LEASE` секунд: `next_attempt_at`
+    сдвигается вперед в той же транзакции, поэтому несколько обработчиков
+    не отправят одно письмо дважды, а письма упавшего обработчика снова
+    станут доступны после окончания аренды.
+
+    При ошибке отправки письмо откладывается с экспоненциальной задержкой
+    `BACKOFF * 2 ** (attempts - 1)`, после `MAX_ATTEMPTS` попыток получает
+    статус `dead` (dead letter) и больше не отправляется.
+
+    Настройки задаются словарем `MAIL_OUTBOX` в settings.py.
+"""
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+DEFAULT_OPTIONS = {
+    'BACKOFF': 60,
+    'BATCH_SIZE': 100,
+    'LEASE': 300,
+    'MAX_ATTEMPTS': 5,
+    'RATE_LIMIT': 0,
+}
+
+
+def get_options():
+    return {**DEFAULT_OPTIONS, **getattr(settings, 'MAIL_OUTBOX', {})}
+
+
+def enqueue_mail(subject, body, recipients, from_email=None):
+    """Ставим письмо в очередь отправки"""
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=','.join(recipients),
+    )
+
+
+def notify_review_comment(review, comment):
+    """Уведомляем автора отзыва о новом комментарии к нему"""
+    author = review.author
+    if author.pk == comment.author_id or not author.email:
+        return None
+    return enqueue_mail(
+        'New comment on your review.',
+        f'{comment.author.username}: {comment.text}',
+        [author.email, ],
+    )
+
+
+class MailDispatcher:
+    """
+    Отправка писем по одному открытому соединению с почтовым бэкендом.
+
+    Письма передаются бэкенду по одному (`send_messages([email])`):
+    при ошибке на середине порции бэкенды не сообщают, какие письма
+    уже ушли, а повтор всей порции дал бы дубли.
+
+    Attributes
+    ----------
+    connection : django.core.mail.backends.base.BaseEmailBackend
+        открытое соединение
+    rate_limit : float
+        не больше писем в секунду, 0 - без ограничения
+    sent, failed : int
+        счётчики отправленных и неотправленных писем
+    """
+
+    def __init__(self, connection, rate_limit=0):
+        self.connection = connection
+        self.rate_limit = rate_limit
+        self.sent = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self):
+        """Отправлено писем в секунду"""
+        elapsed = self.elapsed
+        return self.sent / elapsed if elapsed else 0.0
+
+    def throttle(self):
+        if not self.rate_limit:
+            return
+        delay = (
+            self.started + (self.sent + self.failed) / self.rate_limit
+            - time.monotonic()
+        )
+        if delay > 0:
+            time.sleep(delay)
+
+    def send(self, email):
+        """Отправляем письмо, возвращает ошибку или None"""
+        self.throttle()
+        try:
+            self.connection.send_messages([email])
+        except Exception as error:
+            self.failed += 1
+            return error
+        self.sent += 1
+        return None
+
+
+def claim_batch(batch_size, lease):
+    """Выбираем порцию писем к отправке и арендуем её на `lease` секунд"""
+    now = timezone.now()
+    with transaction.atomic():
+        pks = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxMessage.PENDING, next_attempt_at__lte=now
+            ).order_by('next_attempt_at', 'pk').values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        OutboxMessage.objects.filter(pk__in=pks).update(
+            next_attempt_at=now + timedelta(seconds=lease)
+        )
+    return list(OutboxMessage.objects.filter(pk__in=pks))
+
+
+def build_email(message):
+    return EmailMessage(
+        message.subject,
+        message.body,
+        message.from_email,
+        message.recipients.split(','),
+    )
+
+
+def mark_sent(message):
+    message.status = OutboxMessage.SENT
+    message.attempts += 1
+    message.sent_at = timezone.now()
+    message.last_error = ''
+    message.save(
+        update_fields=['status', 'attempts', 'sent_at', 'last_error']
+    )
+
+
+def mark_failed(message, error, options):
+    """Откладываем письмо с экспоненциальной задержкой или в dead letter"""
+    message.attempts += 1
+    message.last_error = f'{type(error).__name__}: {error}'
+    if message.attempts >= options['MAX_ATTEMPTS']:
+        message.status = OutboxMessage.DEAD
+    else:
+        delay = options['BACKOFF'] * 2 ** (message.attempts - 1)
+        message.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+    message.save(
+        update_fields=['status', 'attempts', 'last_error', 'next_attempt_at']
+    )
+
+
+def send_batch(dispatcher, options=None):
+    """
+    Отправляем одну порцию писем из очереди.
+    Возвращает количество обработанных писем порции.
+    """
+    options = options or get_options()
+    messages = claim_batch(options['BATCH_SIZE'], options['LEASE'])
+    for message in messages:
+        error = dispatcher.send(build_email(message))
+        if error is None:
+            mark_sent(message)
+        else:
+            mark_failed(message, error, options)
+    return len(messages)
+
+
+def drain(options=None):
+    """
+    Разбираем очередь порциями по одному соединению, пока есть письма
+    к отправке. Возвращает диспетчер со счётчиками отправки.
+    """
+    options = options or get_options()
+    with get_connection() as connection:
+        dispatcher = MailDispatcher(connection, options['RATE_LIMIT'])
+        while send_batch(dispatcher, options) == options['BATCH_SIZE']:
+            pass
+    return dispatcher
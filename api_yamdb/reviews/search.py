@@ -0,0 +1,114 @@
+"""
+Полнотекстовый поиск на основе виртуальных таблиц SQLite FTS5.
+
+    Для каждой индексируемой модели создается таблица FTS5 (см. миграции),
+    где `rowid` совпадает с первичным ключом строки модели. Индекс
+    обновляется сигналами при сохранении и удалении объектов, а после
+    массовых операций в обход моделей пересобирается командой
+    `python manage.py rebuildsearch`.
+
+    Поиск присоединяет таблицу индекса к запросу модели через модели
+    только для чтения (`reviews.models.SearchEntry`) и ранжируется
+    встроенной функцией `bm25` (колонка `rank`), каждое слово запроса
+    ищется по префиксу.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import F
+
+from .models import Comment, Review, Title
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+class FullTextIndex:
+    """
+    Полнотекстовый индекс FTS5 по текстовым полям модели.
+
+    Attributes
+    ----------
+    model : django.db.models.Model
+        индексируемая модель
+    fields : tuple
+        текстовые поля модели, совпадают с колонками таблицы индекса
+    table : str
+        имя виртуальной таблицы FTS5
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.table = f'{model._meta.db_table}_fts'
+
+    def update(self, instance):
+        """Добавляем или заменяем строку индекса для объекта"""
+        columns = ', '.join(self.fields)
+        placeholders = ', '.join(['%s'] * (len(self.fields) + 1))
+        values = [getattr(instance, field) or '' for field in self.fields]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, {columns}) '
+                f'VALUES ({placeholders})',
+                [instance.pk, *values]
+            )
+
+    def delete(self, pk):
+        """Удаляем строку индекса по первичному ключу объекта"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [pk]
+            )
+
+    def rebuild(self):
+        """Пересобираем индекс по таблице модели одним запросом"""
+        columns = ', '.join(self.fields)
+        values = ', '.join(f"COALESCE({field}, '')" for field in self.fields)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, {columns}) '
+                f'SELECT id, {values} FROM {self.model._meta.db_table}'
+            )
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table}')
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def build_match(query):
+        """
+        Строим выражение MATCH из пользовательского запроса: каждое слово
+        берется в кавычки (служебный синтаксис FTS5 не интерпретируется)
+        и ищется по префиксу.
+        """
+        return ' '.join(
+            f'"{word}"*' for word in WORD_PATTERN.findall(query)
+        )
+
+    def search(self, queryset, query):
+        """
+        Фильтруем queryset модели по запросу и сортируем по релевантности.
+        Таблица индекса присоединяется один раз (`search_entry`, см.
+        `reviews.models.SearchEntry`), релевантность берется из её колонки
+        `rank` в аннотацию `search_rank`, меньше - лучше.
+        """
+        match = self.build_match(query)
+        if not match:
+            return queryset.none()
+
+        return queryset.filter(
+            search_entry__document__match=match
+        ).annotate(
+            search_rank=F('search_entry__rank')
+        ).order_by('search_rank', 'pk')
+
+
+title_index = FullTextIndex(Title, ('name', 'description'))
+review_index = FullTextIndex(Review, ('text', ))
+comment_index = FullTextIndex(Comment, ('text', ))
+
+search_indexes = {
+    'Title': title_index,
+    'Review': review_index,
+    'Comment': comment_index,
+}
@@ -0,0 +1,154 @@
+"""
+Сигналы для поддержки денормализованных полей моделей.
+
+Сумма оценок, количество отзывов и рейтинг произведения
+(`Title.rating_sum`, `Title.review_count`, `Title.rating`) обновляются
+атомарными выражениями `F()` при создании, изменении оценки и удалении
+отзыва, в том числе при каскадном удалении из `User` и `Title`.
+Так же поддерживается количество комментариев отзыва
+(`Review.comment_count`).
+
+Полнотекстовые индексы произведений, отзывов и комментариев
+(`reviews.search`) обновляются при сохранении и удалении объектов.
+
+Note:
+    Массовые операции в обход модели (`QuerySet.update`, `bulk_create`)
+    сигналы не вызывают. После них рейтинг восстанавливается командой
+    `python manage.py rebuildrating`, поисковый индекс -
+    `python manage.py rebuildsearch`. Расхождения счётчиков исправляет
+    `python manage.py reconcilecounters`.
+"""
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Comment, Review, Title, rating_expression
+from .search import comment_index, review_index, title_index
+
+
+def change_rating(title_id, score, count):
+    """
+    Сдвигаем сумму оценок и количество отзывов произведения на заданные
+    дельты и пересчитываем рейтинг в том же UPDATE (правые части
+    вычисляются по старым значениям строки).
+    """
+    rating_sum = F('rating_sum') + score
+    review_count = F('review_count') + count
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=rating_sum,
+        review_count=review_count,
+        rating=rating_expression(rating_sum, review_count),
+    )
+
+
+def change_comment_count(review_id, count):
+    """Сдвигаем количество комментариев отзыва на заданную дельту"""
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + count
+    )
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, raw, **kwargs):
+    """Запоминаем сохранённые в базе произведение и оценку отзыва"""
+    instance._stored_rating = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._stored_rating = Review.objects.filter(
+        pk=instance.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def add_review_score(sender, instance, created, raw, **kwargs):
+    """Учитываем новую или изменённую оценку в рейтинге произведения"""
+    if raw:
+        return
+    stored = getattr(instance, '_stored_rating', None)
+    new_score = int(instance.score)
+    if created or stored is None:
+        change_rating(instance.title_id, new_score, 1)
+        return
+
+    title_id, score = stored
+    if title_id != instance.title_id:
+        change_rating(title_id, -score, -1)
+        change_rating(instance.title_id, new_score, 1)
+    elif score != new_score:
+        change_rating(instance.title_id, new_score - score, 0)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    """Исключаем оценку удалённого отзыва из рейтинга произведения"""
+    change_rating(instance.title_id, -int(instance.score), -1)
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_review(sender, instance, raw, **kwargs):
+    """Запоминаем сохранённый в базе отзыв комментария"""
+    instance._stored_review_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._stored_review_id = Comment.objects.filter(
+        pk=instance.pk
+    ).values_list('review_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def add_comment(sender, instance, created, raw, **kwargs):
+    """Учитываем новый или перенесённый комментарий в счётчике отзыва"""
+    if raw:
+        return
+    stored = getattr(instance, '_stored_review_id', None)
+    if created or stored is None:
+        change_comment_count(instance.review_id, 1)
+    elif stored != instance.review_id:
+        change_comment_count(stored, -1)
+        change_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_comment(sender, instance, **kwargs):
+    """Исключаем удалённый комментарий из счётчика отзыва"""
+    change_comment_count(instance.review_id, -1)
+
+
+@receiver(post_save, sender=Title)
+def index_title(sender, instance, raw, **kwargs):
+    """Обновляем поисковый индекс сохранённого произведения"""
+    if not raw:
+        title_index.update(instance)
+
+
+@receiver(post_delete, sender=Title)
+def unindex_title(sender, instance, **kwargs):
+    """Удаляем произведение из поискового индекса"""
+    title_index.delete(instance.pk)
+
+
+@receiver(post_save, sender=Review)
+def index_review(sender, instance, raw, **kwargs):
+    """Обновляем поисковый индекс сохранённого отзыва"""
+    if not raw:
+        review_index.update(instance)
+
+
+@receiver(post_delete, sender=Review)
+def unindex_review(sender, instance, **kwargs):
+    """Удаляем отзыв из поискового индекса"""
+    review_index.delete(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, raw, **kwargs):
+    """Обновляем поисковый индекс сохранённого комментария"""
+    if not raw:
+        comment_index.update(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance, **kwargs):
+    """Удаляем комментарий из поискового индекса"""
+    comment_index.delete(instance.pk)
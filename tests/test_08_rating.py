@@ -0,0 +1,89 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+
+from .common import create_comments, create_reviews
+
+
+class Test08Rating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_stored(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.review_count) == (12, 3), (
+            'Проверьте, что при создании отзыва сумма и количество оценок '
+            'сохраняются в модели `Title`'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'score': 8}
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (15, 3), (
+            'Проверьте, что при изменении оценки отзыва обновляется '
+            'сумма оценок произведения'
+        )
+
+        user.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (12, 2), (
+            'Проверьте, что при каскадном удалении отзывов вместе с автором '
+            'рейтинг произведения пересчитывается'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 6, (
+            'Проверьте, что `rating` вычисляется по хранимой сумме оценок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_rating(self, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, review_count=0)
+        call_command('rebuildrating')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.review_count) == (12, 3), (
+            'Проверьте, что команда `rebuildrating` восстанавливает '
+            'рейтинг произведений по отзывам'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_comment_count(self, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        response = admin_client.get(url)
+        assert response.json().get('comment_count') == len(comments), (
+            'Проверьте, что в ответе отзыва есть `comment_count` '
+            'с количеством комментариев'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('review_count') == len(reviews), (
+            'Проверьте, что в ответе произведения есть `review_count` '
+            'с количеством отзывов'
+        )
+
+        user.delete()
+        review = Review.objects.get(pk=reviews[0]['id'])
+        assert review.comment_count == len(comments) - 1, (
+            'Проверьте, что при каскадном удалении комментариев вместе '
+            'с автором уменьшается `comment_count` отзыва'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reconcile_counters(self, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(review_count=0)
+        Review.objects.update(comment_count=0)
+        call_command('reconcilecounters')
+        title = Title.objects.get(pk=titles[0]['id'])
+        review = Review.objects.get(pk=reviews[0]['id'])
+        assert (title.review_count, review.comment_count) == (
+            len(reviews), len(comments)
+        ), (
+            'Проверьте, что команда `reconcilecounters` исправляет '
+            'расхождения счётчиков'
+        )
+        assert not Title.objects.drifted().exists()
+        assert not Review.objects.drifted().exists()
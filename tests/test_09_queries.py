@@ -0,0 +1,121 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from .common import create_comments, create_genre, create_titles
+
+
+class Test09Queries:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_list_queries(self, client, admin_client,
+                                   django_assert_num_queries):
+        create_genre(admin_client)
+        genres = list(Genre.objects.all())
+        category = Category.objects.create(name='Фильм', slug='films')
+        for number in range(15):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000, category=category
+            )
+            title.genre.set(genres)
+
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert len(response.json()['results'][0]['genre']) == len(genres), (
+            'Проверьте, что при GET запросе `/api/v1/titles/` '
+            'возвращаются жанры произведения'
+        )
+
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['category']['slug'] == category.slug, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` '
+            'возвращается категория произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_create_queries(self, admin_client, admin):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'Отзыв', 'score': 7}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data=data)
+        assert response.status_code == 201
+        selects = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'reviews_fts' not in query['sql']
+        ]
+        assert len(selects) == 2, (
+            f'Проверьте, что POST запрос `{url}` проверяет только '
+            'пользователя и существование произведения'
+        )
+
+        response = admin_client.post(url, data=data)
+        assert response.status_code == 400, (
+            f'Проверьте, что повторный POST запрос `{url}` от того же автора '
+            'возвращает статус 400'
+        )
+        response = admin_client.post(
+            '/api/v1/titles/0/reviews/', data=data
+        )
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_comment_path_consistency(self, client, admin_client, admin,
+                                         django_assert_num_queries):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        client.get(url)
+        with django_assert_num_queries(2):
+            response = client.get(url)
+        assert response.json()['count'] == len(comments), (
+            f'Проверьте, что GET запрос `{url}` проверяет отзыв '
+            'и читает комментарии с авторами без лишних запросов'
+        )
+
+        wrong_url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}/comments/'
+        )
+        assert client.get(wrong_url).status_code == 404, (
+            'Проверьте, что комментарии к отзыву другого произведения '
+            'возвращают статус 404'
+        )
+        assert client.get(f'{wrong_url}{comments[0]["id"]}/').status_code == 404
+        response = admin_client.post(wrong_url, data={'text': 'мимо'})
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_feed_page_queries(self, client, monkeypatch,
+                                  django_assert_num_queries):
+        from api.pagination import FeedPagination
+
+        monkeypatch.setattr(FeedPagination, 'page_size', 100)
+        User.objects.bulk_create(
+            User(username=f'reader{number}', email=f'reader{number}@yamdb.fake')
+            for number in range(100)
+        )
+        users = User.objects.filter(username__startswith='reader')
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.bulk_create(
+            Review(title=title, author=user, text='Отзыв', score=5)
+            for user in users
+        )
+        review = Review.objects.first()
+        Comment.objects.bulk_create(
+            Comment(review=review, author=user, text='Комментарий')
+            for user in users
+        )
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        for url in (url, f'{url}{review.id}/comments/'):
+            with django_assert_num_queries(3):
+                response = client.get(url)
+            results = response.json()['results']
+            assert len(results) == 100 and results[0]['author'], (
+                f'Проверьте, что страница `{url}` из 100 объектов '
+                'читается с авторами за постоянное число запросов'
+            )
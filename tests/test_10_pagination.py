@@ -0,0 +1,87 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments, create_reviews
+
+
+class Test10Pagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_cursor(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        response = client.get(url, {'cursor': ''})
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}?cursor=` возвращается статус 200'
+        )
+        data = response.json()
+        assert 'count' not in data and 'next' in data and 'previous' in data, (
+            f'Проверьте, что при GET запросе `{url}?cursor=` '
+            'используется курсорная пагинация'
+        )
+        assert {review['id'] for review in data['results']} == {
+            review['id'] for review in reviews
+        }, (
+            f'Проверьте, что при GET запросе `{url}?cursor=` возвращаются все отзывы'
+        )
+
+        response = client.get(url)
+        assert response.json()['count'] == len(reviews), (
+            f'Проверьте, что при GET запросе `{url}` без `cursor` '
+            'сохраняется постраничная пагинация'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comments_cursor_pages(self, client, admin_client, admin,
+                                      monkeypatch):
+        from api.pagination import FeedCursorPagination
+
+        monkeypatch.setattr(FeedCursorPagination, 'page_size', 2)
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+
+        data = client.get(url, {'cursor': ''}).json()
+        received = [comment['id'] for comment in data['results']]
+        assert len(received) == 2 and data['next'], (
+            f'Проверьте, что при GET запросе `{url}?cursor=` '
+            'возвращается ссылка на следующую страницу'
+        )
+        data = client.get(data['next']).json()
+        received += [comment['id'] for comment in data['results']]
+        assert sorted(received) == sorted(c['id'] for c in comments), (
+            f'Проверьте, что курсорная пагинация `{url}` '
+            'возвращает все комментарии без повторов'
+        )
+        assert data['next'] is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cached_count(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        def count_queries(params):
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url, params)
+            assert response.json()['count'] == len(reviews), (
+                f'Проверьте, что GET запрос `{url}` возвращает '
+                'общее количество отзывов'
+            )
+            return len([
+                query for query in context.captured_queries
+                if 'COUNT(' in query['sql']
+            ])
+
+        assert count_queries({}) == 1
+        assert count_queries({'page': 1}) == 0, (
+            f'Проверьте, что при листании `{url}` количество отзывов '
+            'берётся из кэша'
+        )
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        reviews.pop(0)
+        assert count_queries({'page': 1}) == 1, (
+            f'Проверьте, что после удаления отзыва количество `{url}` '
+            'пересчитывается'
+        )
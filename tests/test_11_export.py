@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from .common import create_reviews
+
+
+class Test11Export:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_export_permissions(self, client, user_client):
+        url = '/api/v1/export/titles.ndjson'
+        response = client.get(url)
+        assert response.status_code == 401, (
+            f'Проверьте, что при GET запросе `{url}` без токена авторизации '
+            'возвращается статус 401'
+        )
+        response = user_client.get(url)
+        assert response.status_code == 403, (
+            f'Проверьте, что при GET запросе `{url}` от обычного пользователя '
+            'возвращается статус 403'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_export_titles_ndjson(self, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        url = '/api/v1/export/titles.ndjson'
+        response = admin_client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` от администратора '
+            'возвращается статус 200'
+        )
+        records = [
+            json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()
+        ]
+        assert len(records) == len(titles)
+        title = next(record for record in records if record['id'] == titles[0]['id'])
+        assert title['rating'] == 4 and title['category'] == titles[0]['category'], (
+            f'Проверьте, что при GET запросе `{url}` произведения выгружаются '
+            'с рейтингом и категорией'
+        )
+        assert sorted(title['genre']) == sorted(titles[0]['genre']), (
+            f'Проверьте, что при GET запросе `{url}` произведения выгружаются с жанрами'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_export_reviews_csv(self, admin_client, admin):
+        reviews, _, _, _ = create_reviews(admin_client, admin)
+        url = '/api/v1/export/review.csv'
+        response = admin_client.get(url)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines[0] == 'id,title_id,text,author,score,pub_date', (
+            f'Проверьте, что при GET запросе `{url}` колонки совпадают '
+            'с файлами загрузки `initdata`'
+        )
+        assert len(lines) == len(reviews) + 1
+
+        response = admin_client.get('/api/v1/export/unknown.csv')
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_export_initdata_round_trip(self, tmp_path):
+        from reviews.export import csv_lines
+        from reviews.management.commands.initdata import load_model_rows
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Без категории', year=2000)
+        path = tmp_path / 'titles.csv'
+        path.write_text(''.join(csv_lines('Title')), encoding='utf-8')
+        Title.objects.filter(pk=title.pk).update(name='Изменено')
+
+        assert load_model_rows(Title, str(path)) == 1, (
+            'Проверьте, что выгрузка произведения без категории '
+            'загружается командой `initdata`'
+        )
+        title.refresh_from_db()
+        assert (title.name, title.category) == ('Без категории', None)
@@ -0,0 +1,124 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_comments, create_titles
+
+
+class Test12Search:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+
+        response = client.get(url, {'search': 'повор'})
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}?search=` возвращается статус 200'
+        )
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [titles[0]['id']], (
+            f'Проверьте, что при GET запросе `{url}?search=` '
+            'слова ищутся по префиксу названия произведения'
+        )
+
+        response = client.get(url, {'search': 'драма'})
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [titles[1]['id']], (
+            f'Проверьте, что при GET запросе `{url}?search=` '
+            'поиск выполняется и по описанию произведения'
+        )
+
+        admin_client.patch(
+            f'{url}{titles[1]["id"]}/',
+            data={'name': 'Поворот обратно', 'category': titles[1]['category']}
+        )
+        response = client.get(url, {'search': 'поворот'})
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что после изменения произведения `{url}?search=` '
+            'находит его по новому названию'
+        )
+
+        admin_client.delete(f'{url}{titles[0]["id"]}/')
+        response = client.get(url, {'search': 'поворот'})
+        results = response.json()['results']
+        assert [title['id'] for title in results] == [titles[1]['id']], (
+            f'Проверьте, что удалённое произведение не находится `{url}?search=`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_comment_search(self, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            admin_client, admin
+        )
+        user_client = auth_client(user)
+        moderator_client = auth_client(moderator)
+        url = '/api/v1/search/reviews/'
+        response = user_client.get(url, {'search': 'qwer'})
+        assert response.status_code == 403, (
+            f'Проверьте, что при GET запросе `{url}` от обычного пользователя '
+            'возвращается статус 403'
+        )
+
+        response = moderator_client.get(url, {'search': 'qwerty123'})
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}` от модератора '
+            'возвращается статус 200'
+        )
+        results = response.json()['results']
+        assert [review['id'] for review in results] == [reviews[1]['id']], (
+            f'Проверьте, что при GET запросе `{url}?search=` '
+            'находятся отзывы по тексту'
+        )
+
+        response = moderator_client.get(
+            url, {'search': 'qwer', 'author': user.username}
+        )
+        results = response.json()['results']
+        assert [review['id'] for review in results] == [reviews[1]['id']], (
+            f'Проверьте, что при GET запросе `{url}?search=&author=` '
+            'поиск ограничивается автором'
+        )
+
+        url = '/api/v1/search/comments/'
+        response = moderator_client.get(
+            url, {'search': 'qwer', 'title': titles[0]['id']}
+        )
+        assert response.json()['count'] == len(comments), (
+            f'Проверьте, что при GET запросе `{url}?search=&title=` '
+            'находятся комментарии к отзывам произведения'
+        )
+        response = moderator_client.get(
+            url, {'search': 'qwer', 'title': titles[1]['id']}
+        )
+        assert response.json()['count'] == 0
+
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+            f'comments/{comments[0]["id"]}/'
+        )
+        response = moderator_client.get(url, {'search': 'qwerty'})
+        assert comments[0]['id'] not in [
+            comment['id'] for comment in response.json()['results']
+        ], (
+            f'Проверьте, что удалённый комментарий не находится `{url}?search=`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_single_match(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'search': 'поворот'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ]
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if 'MATCH' in query['sql']
+        ]
+        assert queries and all(sql.count('MATCH') == 1 for sql in queries), (
+            f'Проверьте, что `{url}?search=` присоединяет поисковый индекс '
+            'один раз и берет релевантность из него, без подзапроса '
+            'на каждую строку'
+        )
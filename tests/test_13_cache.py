@@ -0,0 +1,173 @@
+import pytest
+
+from .common import create_categories, create_genre, create_reviews
+
+
+class Test13Cache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_category_genre_cache(self, client, admin_client,
+                                     django_assert_num_queries):
+        categories = create_categories(admin_client)
+        genres = create_genre(admin_client)
+
+        for url, objects in (('/api/v1/categories/', categories),
+                             ('/api/v1/genres/', genres)):
+            client.get(url)
+            with django_assert_num_queries(0):
+                response = client.get(url)
+            assert response.json()['count'] == len(objects), (
+                f'Проверьте, что повторный GET запрос `{url}` '
+                'отдаётся из кэша без запросов к базе'
+            )
+
+            slug = objects[0]['slug']
+            admin_client.delete(f'{url}{slug}/')
+            response = client.get(url)
+            assert response.json()['count'] == len(objects) - 1, (
+                f'Проверьте, что после DELETE запроса `{url}{{slug}}/` '
+                'кэш списка инвалидируется'
+            )
+
+        response = client.get('/api/v1/genres/', {'search': 'Драма'})
+        assert response.json()['count'] == 1, (
+            'Проверьте, что кэш `/api/v1/genres/` учитывает параметры запроса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_shared_cache(self, client, admin_client, settings,
+                             django_assert_num_queries):
+        from api.cache import response_cache
+
+        settings.API_CACHE = {**settings.API_CACHE, 'SHARED_ALIAS': 'default'}
+        url = '/api/v1/categories/'
+        create_categories(admin_client)
+        client.get(url)
+
+        response_cache.clear()
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.json()['count'] == 2, (
+            f'Проверьте, что GET запрос `{url}` отдаётся из общего кэша'
+        )
+        admin_client.post(url, data={'name': 'Музыка', 'slug': 'music'})
+        response_cache.clear()
+        response = client.get(url)
+        assert response.json()['count'] == 3, (
+            f'Проверьте, что версия кэша `{url}` хранится в общем кэше'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_title_cache(self, client, admin_client, admin,
+                            django_assert_num_queries):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = '/api/v1/titles/'
+        detail_url = f'{url}{titles[0]["id"]}/'
+
+        for cached_url in (url, detail_url):
+            response = client.get(cached_url)
+            assert response['X-Cache'] == 'MISS'
+            with django_assert_num_queries(0):
+                response = client.get(cached_url)
+            assert response['X-Cache'] == 'HIT', (
+                f'Проверьте, что повторный GET запрос `{cached_url}` '
+                'отдаётся из кэша без запросов к базе'
+            )
+        rating = response.json()['rating']
+
+        other_url = f'{url}{titles[1]["id"]}/'
+        client.get(other_url)
+        admin_client.patch(
+            f'{detail_url}reviews/{reviews[0]["id"]}/', data={'score': 10}
+        )
+        response = client.get(detail_url)
+        assert response.json()['rating'] != rating, (
+            'Проверьте, что после изменения оценки кэш произведения '
+            'инвалидируется'
+        )
+        assert client.get(other_url)['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение оценки не инвалидирует кэш '
+            'других произведений'
+        )
+
+        admin_client.patch(
+            detail_url,
+            data={'genre': titles[1]['genre'], 'category': titles[0]['category']}
+        )
+        response = client.get(detail_url)
+        genres = [genre['slug'] for genre in response.json()['genre']]
+        assert genres == titles[1]['genre'], (
+            'Проверьте, что после изменения жанров произведения '
+            'его кэш инвалидируется'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bump_on_commit(self):
+        from django.db import transaction
+
+        from api.cache import response_cache
+        from reviews.models import Category
+
+        version = response_cache.get_version('categories')
+        with transaction.atomic():
+            Category.objects.create(name='Музыка', slug='music')
+            assert response_cache.get_version('categories') == version, (
+                'Проверьте, что версия кэша увеличивается только после '
+                'фиксации транзакции записи'
+            )
+        assert response_cache.get_version('categories') != version
+
+        version = response_cache.get_version('categories')
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Category.objects.create(name='Книги', slug='books')
+                raise RuntimeError
+        assert response_cache.get_version('categories') == version, (
+            'Проверьте, что откат транзакции не меняет версию кэша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_cache_stats(self, client, admin_client):
+        url = '/api/v1/cache/stats/'
+        response = client.get(url)
+        assert response.status_code in (401, 403), (
+            f'Проверьте, что `{url}` доступен только администратору'
+        )
+
+        def categories():
+            response = admin_client.get(url)
+            assert response.status_code == 200
+            return response.json()['namespaces'].get(
+                'categories', {'hits': 0, 'misses': 0}
+            )
+
+        before = categories()
+        client.get('/api/v1/categories/', {'search': 'stats'})
+        client.get('/api/v1/categories/', {'search': 'stats'})
+        after = categories()
+        assert (
+            after['hits'] - before['hits'], after['misses'] - before['misses']
+        ) == (1, 1), (
+            f'Проверьте, что `{url}` показывает попадания и промахи кэша '
+            'по пространствам имен'
+        )
+        assert after['hit_rate'] is not None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_cache_key_host(self, client):
+        from reviews.models import Category
+
+        Category.objects.bulk_create(
+            Category(name=f'Категория {i}', slug=f'category-{i}')
+            for i in range(11)
+        )
+        url = '/api/v1/categories/'
+        client.get(url, HTTP_HOST='a.example')
+        response = client.get(url, HTTP_HOST='b.example')
+        assert response['X-Cache'] == 'MISS', (
+            f'Проверьте, что кэш `{url}` учитывает хост запроса'
+        )
+        assert response.json()['next'].startswith('http://b.example/'), (
+            'Проверьте, что ссылки пагинации из кэша построены '
+            'для хоста запроса'
+        )
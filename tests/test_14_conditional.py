@@ -0,0 +1,80 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test14ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_etag_not_modified(self, client, admin_client, admin,
+                                  django_assert_num_queries):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        urls = (
+            '/api/v1/categories/',
+            '/api/v1/titles/',
+            title_url,
+            f'{title_url}reviews/',
+            f'{review_url}comments/',
+        )
+        for url in urls:
+            etag = client.get(url)['ETag']
+            with django_assert_num_queries(0):
+                response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 304, (
+                f'Проверьте, что GET запрос `{url}` с актуальным ETag '
+                'возвращает статус 304 без запросов к базе'
+            )
+
+        etag = client.get(f'{title_url}reviews/')['ETag']
+        admin_client.patch(review_url, data={'text': 'обновлено'})
+        response = client.get(f'{title_url}reviews/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после изменения отзыва ETag ленты отзывов меняется'
+        )
+
+        url = f'{review_url}comments/'
+        etag = client.get(url)['ETag']
+        admin_client.delete(f'{url}{comments[0]["id"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после удаления комментария ETag ленты меняется'
+        )
+        assert response.json()['count'] == len(comments) - 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comment_count_etag(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        review_url = f'{reviews_url}{reviews[0]["id"]}/'
+        etags = {
+            url: client.get(url)['ETag'] for url in (reviews_url, review_url)
+        }
+
+        admin_client.post(f'{review_url}comments/', data={'text': 'ещё'})
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                f'Проверьте, что после создания комментария ETag `{url}` '
+                'меняется: в ответе выводится `comment_count`'
+            )
+        assert response.json()['comment_count'] == len(comments) + 1
+
+        etag = client.get(review_url)['ETag']
+        admin_client.delete(f'{review_url}comments/{comments[0]["id"]}/')
+        response = client.get(review_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что после удаления комментария ETag отзыва меняется'
+        )
+        assert response.json()['comment_count'] == len(comments)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_no_etag_without_shared_cache(self, client, settings):
+        settings.API_CACHE = {**settings.API_CACHE, 'SHARED_ALIAS': None}
+        response = client.get('/api/v1/categories/')
+        assert response.status_code == 200
+        assert not response.has_header('ETag'), (
+            'Проверьте, что без общего уровня кэша ETag не выдается: '
+            'локальные версии не видят изменений в других процессах'
+        )
@@ -0,0 +1,67 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Title
+
+from .common import auth_client, create_reviews
+
+
+class Test15TitleOrdering:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_filters_and_ordering(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        admin_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={'text': 'отлично', 'score': 9}
+        )
+        url = '/api/v1/titles/'
+
+        response = client.get(url, {'ordering': '-rating'})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что `{url}?ordering=-rating` сортирует '
+            'произведения по убыванию рейтинга'
+        )
+        response = client.get(url, {'rating_min': 5})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[1]['id']
+        ], f'Проверьте фильтр `{url}?rating_min=`'
+        response = client.get(url, {'year_min': 1990, 'year_max': 2010})
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id']
+        ], f'Проверьте фильтры `{url}?year_min=&year_max=`'
+
+        with CaptureQueriesContext(connection) as context:
+            list(Title.objects.order_by('-rating', 'pk')[:1])
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN ' + context.captured_queries[-1]['sql']
+            )
+            plan = ' '.join(str(row) for row in cursor.fetchall())
+        assert 'title_rating' in plan, (
+            'Проверьте, что сортировка по рейтингу использует индекс'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rating_round_half_even(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/'
+        admin_client.post(f'{url}reviews/', data={'text': 'да', 'score': 4})
+        auth_client(user).post(f'{url}reviews/', data={'text': 'да', 'score': 5})
+        assert client.get(url).json()['rating'] == 4, (
+            'Проверьте, что рейтинг округляется как `round()` в Python: '
+            'средняя оценка 4.5 дает рейтинг 4'
+        )
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        admin_client.delete(f'{url}reviews/{reviews[2]["id"]}/')
+        admin_client.patch(
+            f'{url}reviews/{reviews[1]["id"]}/', data={'score': 2}
+        )
+        response = client.get(url)
+        assert response.json()['rating'] == 4, (
+            'Проверьте, что средняя оценка 3.5 дает рейтинг 4'
+        )
@@ -0,0 +1,123 @@
+import pytest
+
+from .common import auth_client, create_reviews
+
+
+class Test16Leaderboard:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top_titles(self, client, admin_client, admin):
+        from api.leaderboard import leaderboards
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = '/api/v1/titles/'
+        for review, score in zip(reviews, (9, 9, 8)):
+            admin_client.patch(
+                f'{url}{titles[0]["id"]}/reviews/{review["id"]}/',
+                data={'score': score}
+            )
+        response = admin_client.post(
+            f'{url}{titles[1]["id"]}/reviews/', data={'text': 'шедевр', 'score': 10}
+        )
+        review_id = response.json()['id']
+        response = admin_client.post(url, data={
+            'name': 'Провал', 'year': 2001, 'genre': ['drama'], 'category': 'films'
+        })
+        low_title = response.json()['id']
+        for uclient in (admin_client, auth_client(user), auth_client(moderator)):
+            uclient.post(f'{url}{low_title}/reviews/', data={'text': 'нет', 'score': 1})
+
+        top_url = f'{url}top/'
+        response = client.get(top_url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{top_url}` возвращает статус 200'
+        )
+        assert [title['id'] for title in response.json()] == [
+            titles[1]['id'], titles[0]['id'], low_title
+        ], (
+            f'Проверьте, что `{top_url}` сортирует произведения по рейтингу'
+        )
+
+        response = client.get(top_url, {'weighted': 'true'})
+        assert [title['id'] for title in response.json()][:2] == [
+            titles[0]['id'], titles[1]['id']
+        ], (
+            f'Проверьте, что во взвешенном рейтинге `{top_url}?weighted=true` '
+            'произведение с одним отзывом не занимает первое место'
+        )
+
+        response = client.get(top_url, {'genre': 'drama', 'limit': 1})
+        assert [title['id'] for title in response.json()] == [titles[1]['id']], (
+            f'Проверьте фильтры `{top_url}?genre=&limit=`'
+        )
+
+        boards = set(leaderboards.boards)
+        admin_client.patch(
+            f'{url}{titles[1]["id"]}/reviews/{review_id}/', data={'score': 2}
+        )
+        assert set(leaderboards.boards) == boards, (
+            'Проверьте, что изменение оценки обновляет рейтинги '
+            'без их перестроения'
+        )
+        response = client.get(top_url)
+        assert [title['id'] for title in response.json()] == [
+            titles[0]['id'], titles[1]['id'], low_title
+        ], (
+            f'Проверьте, что после изменения оценки `{top_url}` обновляется'
+        )
+
+        response = client.get(top_url, {'limit': 0})
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_new_review_updates_boards(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = '/api/v1/titles/'
+        top_url = f'{url}top/'
+        response = client.get(top_url)
+        assert [title['id'] for title in response.json()] == [titles[0]['id']]
+
+        response = auth_client(user).post(
+            f'{url}{titles[1]["id"]}/reviews/', data={'text': 'так', 'score': 4}
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что отзыв с оценкой, равной оценке произведения '
+            'в рейтинге, создается при построенных рейтингах'
+        )
+        response = client.get(top_url)
+        assert [title['id'] for title in response.json()] == [
+            titles[0]['id'], titles[1]['id']
+        ], (
+            f'Проверьте, что новый отзыв добавляет произведение в `{top_url}`'
+        )
+
+        auth_client(moderator).post(
+            f'{url}{titles[1]["id"]}/reviews/', data={'text': 'да', 'score': 10}
+        )
+        response = client.get(top_url)
+        assert [title['id'] for title in response.json()] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            f'Проверьте, что новый отзыв переставляет произведение в `{top_url}`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unknown_slug(self, client, admin_client, admin):
+        from api.leaderboard import leaderboards
+
+        create_reviews(admin_client, admin)
+        top_url = '/api/v1/titles/top/'
+        client.get(top_url)
+        boards = set(leaderboards.boards)
+        for params in ({'genre': 'nope'}, {'category': 'nope'}):
+            response = client.get(top_url, params)
+            assert response.status_code == 404, (
+                f'Проверьте, что `{top_url}` с несуществующим жанром '
+                'или категорией возвращает статус 404'
+            )
+        assert set(leaderboards.boards) == boards, (
+            'Проверьте, что для несуществующих жанров и категорий '
+            'рейтинги не создаются'
+        )
+        response = client.get(top_url, {'category': 'films'})
+        assert response.status_code == 200
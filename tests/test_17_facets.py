@@ -0,0 +1,60 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test17Facets:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_facets(self, client, admin_client,
+                             django_assert_max_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        url = '/api/v1/titles/facets/'
+        with django_assert_max_num_queries(4):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+        )
+        data = response.json()
+        assert data['count'] == len(titles)
+        assert {genre['slug']: genre['count'] for genre in data['genre']} == {
+            genre['slug']: 1 for genre in genres
+        }, f'Проверьте, что `{url}` считает произведения по жанрам'
+        assert {
+            category['slug']: category['count']
+            for category in data['category']
+        } == {category['slug']: 1 for category in categories}, (
+            f'Проверьте, что `{url}` считает произведения по категориям'
+        )
+        assert data['decade'] == [
+            {'decade': 2000, 'count': 1}, {'decade': 2020, 'count': 1}
+        ], f'Проверьте, что `{url}` считает произведения по десятилетиям'
+
+        response = client.get(url, {'genre': genres[0]['slug']})
+        data = response.json()
+        assert data['count'] == 1 and data['decade'] == [
+            {'decade': 2000, 'count': 1}
+        ], (
+            f'Проверьте, что `{url}` учитывает параметры фильтрации списка'
+        )
+        assert {genre['slug'] for genre in data['genre']} == {
+            titles[0]['genre'][0], titles[0]['genre'][1]
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_facets_with_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = '/api/v1/titles/facets/'
+        response = client.get(url, {'search': 'драма'})
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{url}?search=` возвращает статус 200'
+        )
+        data = response.json()
+        assert data['count'] == 1 and data['decade'] == [
+            {'decade': 2020, 'count': 1}
+        ], (
+            f'Проверьте, что `{url}` учитывает полнотекстовый поиск'
+        )
+        assert [category['slug'] for category in data['category']] == [
+            titles[1]['category']
+        ]
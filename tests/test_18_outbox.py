@@ -0,0 +1,83 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from reviews.models import OutboxMessage
+
+from .common import create_comments
+
+
+class Test18Outbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_enqueues_mail(self, client):
+        outbox_before_count = len(mail.outbox)
+        data = {'email': 'queued@yamdb.fake', 'username': 'queued'}
+        response = client.post(self.url_signup, data=data)
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST запрос `{self.url_signup}` не отправляет '
+            'письмо сам, а ставит его в очередь'
+        )
+        message = OutboxMessage.objects.get()
+        assert message.status == OutboxMessage.PENDING
+        assert message.recipients == data['email']
+
+        call_command('sendoutbox')
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.SENT, (
+            'Проверьте, что команда `sendoutbox` отправляет письма из очереди'
+        )
+        assert mail.outbox[-1].to == [data['email']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry_and_dead_letter(self, client, settings, monkeypatch):
+        def fail(self, messages):
+            raise ConnectionError('mail server is down')
+
+        settings.MAIL_OUTBOX = {
+            **settings.MAIL_OUTBOX, 'BACKOFF': 0, 'MAX_ATTEMPTS': 2
+        }
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        client.post(
+            self.url_signup,
+            data={'email': 'retry@yamdb.fake', 'username': 'retry'}
+        )
+        call_command('sendoutbox')
+        message = OutboxMessage.objects.get()
+        assert (message.status, message.attempts) == (
+            OutboxMessage.PENDING, 1
+        ), (
+            'Проверьте, что при ошибке отправки письмо откладывается '
+            'для повторной попытки'
+        )
+        assert 'mail server is down' in message.last_error
+
+        call_command('sendoutbox')
+        message.refresh_from_db()
+        assert message.status == OutboxMessage.DEAD, (
+            'Проверьте, что после `MAX_ATTEMPTS` попыток письмо '
+            'получает статус `dead`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_comment_notification(self, admin_client, admin):
+        create_comments(admin_client, admin)
+        messages = OutboxMessage.objects.filter(
+            subject='New comment on your review.'
+        )
+        assert messages.count() == 2, (
+            'Проверьте, что автору отзыва ставится в очередь уведомление '
+            'о каждом чужом комментарии'
+        )
+        assert {message.recipients for message in messages} == {admin.email}
+
+        call_command('sendoutbox', '--rate-limit', '1000')
+        assert not OutboxMessage.objects.exclude(
+            status=OutboxMessage.SENT
+        ).exists(), (
+            'Проверьте, что команда `sendoutbox` отправляет уведомления '
+            'по одному соединению'
+        )
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from reviews.models import OutboxMessage, User
+
+
+class Test19Confirmation:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+    data = {'email': 'code@yamdb.fake', 'username': 'code'}
+
+    def signup(self, client):
+        client.post(self.url_signup, data=self.data)
+        return OutboxMessage.objects.latest('pk').body
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_hashed_code(self, client):
+        code = self.signup(client)
+        user = User.objects.get(username=self.data['username'])
+        assert len(code) == 8 and code not in user.confirmation_code, (
+            'Проверьте, что код подтверждения короткий и хранится '
+            'в базе только в виде хэша'
+        )
+        assert len(user.confirmation_code) == 64
+
+        data = {'username': self.data['username'], 'confirmation_code': code}
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 200 and 'token' in response.json(), (
+            f'Проверьте, что POST запрос `{self.url_token}` с кодом из письма '
+            'возвращает токен'
+        )
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 400, (
+            f'Проверьте, что код подтверждения `{self.url_token}` '
+            'можно использовать только один раз'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_attempts_and_expiry(self, client, settings):
+        settings.CONFIRMATION_CODE = {
+            **settings.CONFIRMATION_CODE, 'MAX_ATTEMPTS': 2
+        }
+        code = self.signup(client)
+        data = {'username': self.data['username'], 'confirmation_code': '0'}
+        for _ in range(2):
+            client.post(self.url_token, data=data)
+        data['confirmation_code'] = code
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 400, (
+            f'Проверьте, что после `MAX_ATTEMPTS` неверных попыток '
+            f'`{self.url_token}` не принимает даже верный код'
+        )
+
+        data['confirmation_code'] = self.signup(client)
+        User.objects.filter(username=self.data['username']).update(
+            confirmation_code_expires=timezone.now() - timedelta(seconds=1)
+        )
+        response = client.post(self.url_token, data=data)
+        assert response.status_code == 400, (
+            f'Проверьте, что `{self.url_token}` не принимает '
+            'просроченный код подтверждения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_signup_queries(self, client, django_assert_max_num_queries):
+        # чтение, BEGIN, запись пользователя и письма
+        with django_assert_max_num_queries(4):
+            response = client.post(self.url_signup, data=self.data)
+        assert response.status_code == 200, (
+            f'Проверьте, что POST запрос `{self.url_signup}` нового '
+            'пользователя - это одно чтение и запись пользователя и письма'
+        )
+        with django_assert_max_num_queries(4):
+            client.post(self.url_signup, data=self.data)
+
+        data = {'email': self.data['email'], 'username': 'other'}
+        with django_assert_max_num_queries(1):
+            response = client.post(self.url_signup, data=data)
+        assert response.status_code == 400 and 'email' in response.json(), (
+            f'Проверьте, что POST запрос `{self.url_signup}` с занятым email '
+            'отклоняется одним запросом'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_signup_ignores_role(self, client):
+        response = client.post(
+            self.url_signup, data={**self.data, 'role': User.ADMIN}
+        )
+        assert response.status_code == 200, (
+            f'Проверьте, что POST запрос `{self.url_signup}` с полем `role` '
+            'возвращает статус 200'
+        )
+        user = User.objects.get(username=self.data['username'])
+        assert user.role == User.USER, (
+            f'Проверьте, что при POST запросе `{self.url_signup}` '
+            'пользователь всегда получает роль `user`'
+        )